@@ -0,0 +1,229 @@
+"""Benchmarks of the geometry code, run with: python benchmark.py <name> --help"""
+
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import curve_subdivision
+import obj_io
+from half_edge import Mesh
+from half_edge_array import ArrayMesh
+from mesh_subdivision import Butterfly, loop_step
+
+
+def _python_interpolate(points, weights, levels):
+    # the tuple based loop subdivision_2d used before the NumPy engine
+    for _ in range(levels):
+        new_points = []
+        for i in range(len(points)):
+            p0 = points[i - 1]
+            p1 = points[i]
+            p2 = points[(i + 1) % len(points)]
+            p3 = points[(i + 2) % len(points)]
+            new_points.append((
+                weights[0] * p0[0] + weights[1] * p1[0] + weights[2] * p2[0] + weights[3] * p3[0],
+                weights[0] * p0[1] + weights[1] * p1[1] + weights[2] * p2[1] + weights[3] * p3[1],
+            ))
+        merged = []
+        for p, q in zip(points, new_points):
+            merged.append(p)
+            merged.append(q)
+        points = merged
+    return points
+
+
+def _circle(n, seed=0):
+    rng = np.random.default_rng(seed)
+    angles = np.sort(rng.uniform(0, 2 * np.pi, n))
+    radii = 1 + 0.1 * rng.standard_normal(n)
+    return np.column_stack((radii * np.cos(angles), radii * np.sin(angles)))
+
+
+def bench_curves(sizes=(1_000, 100_000, 1_000_000), levels=3, python_limit=100_000):
+    weights = (-1 / 16, 9 / 16, 9 / 16, -1 / 16)
+    print(f"2D interpolating subdivision, {levels} levels")
+    print("=" * 50)
+    for n in sizes:
+        polygon = _circle(n)
+        start = time.perf_counter()
+        result = curve_subdivision.interpolate(polygon, weights, levels)
+        numpy_time = time.perf_counter() - start
+        line = f"  {n:>10,} -> {len(result):>11,} points  numpy {numpy_time * 1000:9.1f} ms"
+        if n <= python_limit:
+            points = [tuple(p) for p in polygon.tolist()]
+            start = time.perf_counter()
+            expected = _python_interpolate(points, weights, levels)
+            python_time = time.perf_counter() - start
+            assert np.allclose(expected, result)
+            line += f"  python {python_time * 1000:9.1f} ms  x{python_time / numpy_time:.0f}"
+        print(line)
+    print("=" * 50)
+
+
+def grid_mesh(n):
+    """Open n x n grid in the xy plane, 2 * n * n triangles."""
+    xs, ys = np.meshgrid(np.arange(n + 1, dtype=np.float64), np.arange(n + 1, dtype=np.float64))
+    positions = np.column_stack((xs.ravel(), ys.ravel(), np.zeros(xs.size)))
+    corner = (np.arange(n)[:, None] * (n + 1) + np.arange(n)).ravel()
+    a, b, c, d = corner, corner + 1, corner + n + 2, corner + n + 1
+    faces = np.empty((2 * len(corner), 3), dtype=np.int32)
+    faces[0::2] = np.column_stack((a, b, c))
+    faces[1::2] = np.column_stack((a, c, d))
+    return positions, faces
+
+
+def bench_mesh_build(triangles=(10**5, 10**6, 10**7), object_limit=10**6):
+    print("Half-edge construction (twin matching and boundary loops)")
+    print("=" * 50)
+    for count in triangles:
+        n = max(1, int(round((count / 2) ** 0.5)))
+        positions, faces = grid_mesh(n)
+        start = time.perf_counter()
+        mesh = ArrayMesh.build_from_faces(positions, faces)
+        array_time = time.perf_counter() - start
+        line = (f"  {len(faces):>11,} triangles  arrays {array_time:7.2f} s  "
+                f"{mesh.nbytes / 2**20:8.1f} MiB")
+        del mesh
+        if len(faces) <= object_limit:
+            start = time.perf_counter()
+            Mesh.build_from_faces(positions, faces)
+            line += f"  objects {time.perf_counter() - start:7.2f} s"
+        print(line)
+    print("=" * 50)
+
+
+def _python_read_obj(path):
+    # the line by line parser Mesh.load_obj used before obj_io
+    positions = []
+    faces = []
+    with open(path, 'r') as fh:
+        for line in fh:
+            if not line.strip() or line.startswith('#'):
+                continue
+            parts = line.split()
+            if parts[0] == 'v':
+                x, y, z = parts[1:4]
+                positions.append((float(x), float(y), float(z)))
+            elif parts[0] == 'f':
+                idxs = []
+                for tok in parts[1:]:
+                    idx = int(tok.split('/')[0])
+                    idxs.append(len(positions) + idx if idx < 0 else idx - 1)
+                for i in range(1, len(idxs) - 1):
+                    faces.append((idxs[0], idxs[i], idxs[i + 1]))
+    return positions, faces
+
+
+def write_grid_obj(path, n):
+    """Write grid_mesh(n) as an OBJ with quad faces, like a scanned surface."""
+    positions, _ = grid_mesh(n)
+    corner = (np.arange(n)[:, None] * (n + 1) + np.arange(n)).ravel() + 1
+    quads = np.column_stack((corner, corner + 1, corner + n + 2, corner + n + 1))
+    with open(path, "w") as f:
+        np.savetxt(f, positions, fmt="v %.6f %.6f %.6f")
+        np.savetxt(f, quads, fmt="f %d %d %d %d")
+
+
+def bench_obj(triangles=(10**4, 10**5, 10**6), python_limit=10**6):
+    print("OBJ loading (quad grid, fan-triangulated)")
+    print("=" * 50)
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in triangles:
+            n = max(1, int(round((count / 2) ** 0.5)))
+            path = os.path.join(tmp, f"grid{n}.obj")
+            write_grid_obj(path, n)
+
+            start = time.perf_counter()
+            positions, faces = obj_io.read_obj(path)
+            parse_time = time.perf_counter() - start
+            line = f"  {len(faces):>10,} triangles  read_obj {parse_time * 1000:8.1f} ms"
+            if len(faces) <= python_limit:
+                start = time.perf_counter()
+                expected = _python_read_obj(path)
+                python_time = time.perf_counter() - start
+                assert np.array_equal(expected[1], faces) and np.allclose(expected[0], positions)
+                line += f"  line parser {python_time * 1000:8.1f} ms"
+
+            obj_io.load_mesh(path)  # parses, builds and writes the cache
+            start = time.perf_counter()
+            obj_io.load_mesh(path)
+            line += f"  cached {(time.perf_counter() - start) * 1000:6.2f} ms"
+            print(line)
+    print("=" * 50)
+
+
+def bench_subdivision(scheme, triangles=10**5, levels=3):
+    n = max(1, int(round((triangles / 2) ** 0.5)))
+    mesh = ArrayMesh.build_from_faces(*grid_mesh(n))
+    print(f"{scheme.__name__} on a {len(mesh.face_halfedge):,} triangle grid")
+    print("=" * 50)
+    total = 0.0
+    for level in range(1, levels + 1):
+        start = time.perf_counter()
+        mesh = scheme(mesh)
+        elapsed = time.perf_counter() - start
+        total += elapsed
+        print(f"  level {level}  {len(mesh.face_halfedge):>12,} faces  {elapsed:7.2f} s  "
+              f"({elapsed / len(mesh.face_halfedge) * 1e9:5.0f} ns/face)")
+    print(f"  total {total:.2f} s")
+    print("=" * 50)
+
+
+def bench_butterfly(triangles=10**5, levels=3, tensions=(1 / 16, 0.0, 1 / 10)):
+    n = max(1, int(round((triangles / 2) ** 0.5)))
+    butterfly = Butterfly(ArrayMesh.build_from_faces(*grid_mesh(n)))
+    print(f"Butterfly, {levels} levels on a {len(butterfly.mesh.face_halfedge):,} triangle grid")
+    print("=" * 50)
+    for i, tension in enumerate(tensions):
+        start = time.perf_counter()
+        mesh = butterfly.subdivide(levels, tension)
+        elapsed = time.perf_counter() - start
+        note = "builds stencils" if i == 0 else "reuses stencils"
+        print(f"  tension {tension:.4f}  {len(mesh.face_halfedge):>12,} faces  {elapsed:7.2f} s  ({note})")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Geometry benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    curves = sub.add_parser("curves", help="NumPy vs pure Python 2D subdivision")
+    curves.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    curves.add_argument("--levels", type=int, default=3)
+    curves.add_argument("--python-limit", type=int, default=100_000,
+                        help="largest polygon the pure Python version is timed on")
+
+    mesh = sub.add_parser("mesh", help="array based half-edge construction on grid meshes")
+    mesh.add_argument("--triangles", type=int, nargs="+", default=[10**5, 10**6, 10**7])
+    mesh.add_argument("--object-limit", type=int, default=10**6,
+                      help="largest mesh also converted to the object based Mesh")
+
+    obj = sub.add_parser("obj", help="bulk OBJ parsing and the binary mesh cache")
+    obj.add_argument("--triangles", type=int, nargs="+", default=[10**4, 10**5, 10**6])
+    obj.add_argument("--python-limit", type=int, default=10**6,
+                     help="largest mesh also read with the line by line parser")
+
+    loop = sub.add_parser("loop", help="Loop subdivision levels on a grid mesh")
+    loop.add_argument("--triangles", type=int, default=10**5)
+    loop.add_argument("--levels", type=int, default=3)
+
+    butterfly = sub.add_parser("butterfly", help="Butterfly levels with stencils reused across tensions")
+    butterfly.add_argument("--triangles", type=int, default=10**5)
+    butterfly.add_argument("--levels", type=int, default=3)
+    butterfly.add_argument("--tensions", type=float, nargs="+", default=[1 / 16, 0.0, 1 / 10])
+
+    args = parser.parse_args()
+    if args.bench == "curves":
+        bench_curves(tuple(args.sizes), args.levels, args.python_limit)
+    elif args.bench == "obj":
+        bench_obj(tuple(args.triangles), args.python_limit)
+    elif args.bench == "butterfly":
+        bench_butterfly(args.triangles, args.levels, tuple(args.tensions))
+    elif args.bench == "loop":
+        bench_subdivision(loop_step, args.triangles, args.levels)
+    elif args.bench == "mesh":
+        bench_mesh_build(tuple(args.triangles), args.object_limit)
@@ -0,0 +1,109 @@
+"""NumPy subdivision of closed 2D polygons.
+
+A polygon is an (N, 2) float array. One level of a 4-point scheme keeps every
+point and inserts a new one between points i and i+1:
+
+    new_i = w0 * p[i-1] + w1 * p[i] + w2 * p[i+1] + w3 * p[i+2]
+
+The neighbours are read as shifted slices of a wrapped copy of the polygon and
+old and new points are interleaved by strided assignment, so a level costs a
+handful of array operations regardless of N.
+"""
+
+import numpy as np
+
+
+def as_polygon(points):
+    """Return points as a contiguous (N, 2) float64 array."""
+    return np.ascontiguousarray(points, dtype=np.float64).reshape(-1, 2)
+
+
+def interpolate_step(points, weights):
+    """One level of the interpolating 4-point scheme, returns 2N points."""
+    points = as_polygon(points)
+    n = len(points)
+    if n == 0:
+        return points
+    w0, w1, w2, w3 = weights
+    # wrapped: p[-1], p[0], ..., p[n-1], p[0], p[1] (indices taken mod n)
+    wrapped = np.take(points, np.arange(-1, n + 2), axis=0, mode="wrap")
+
+    out = np.empty((2 * n, 2))
+    out[0::2] = points
+    new = out[1::2]
+    # accumulate in place so only one temporary is alive at a time
+    np.multiply(wrapped[:n], w0, out=new)
+    new += w1 * wrapped[1:n + 1]
+    new += w2 * wrapped[2:n + 2]
+    new += w3 * wrapped[3:n + 3]
+    return out
+
+
+def interpolate(points, weights, levels):
+    """Apply interpolate_step levels times."""
+    points = as_polygon(points)
+    for _ in range(levels):
+        points = interpolate_step(points, weights)
+    return points
+
+
+def chaikin_step(points):
+    """Chaikin corner cutting, every edge is replaced by its 1/4 and 3/4 points."""
+    points = as_polygon(points)
+    following = np.roll(points, -1, axis=0)
+    out = np.empty((2 * len(points), 2))
+    out[0::2] = 0.75 * points + 0.25 * following
+    out[1::2] = 0.25 * points + 0.75 * following
+    return out
+
+
+def bspline_step(points):
+    """Uniform cubic B-spline refinement, the curve approaches the B-spline of the polygon."""
+    points = as_polygon(points)
+    previous = np.roll(points, 1, axis=0)
+    following = np.roll(points, -1, axis=0)
+    out = np.empty((2 * len(points), 2))
+    out[0::2] = (previous + 6 * points + following) / 8
+    out[1::2] = (points + following) / 2
+    return out
+
+
+APPROXIMATING = {
+    "chaikin": chaikin_step,
+    "bspline": bspline_step,
+}
+
+
+def subdivide_step(points, scheme):
+    """scheme is a name from APPROXIMATING or the 4 weights of the interpolating scheme."""
+    if isinstance(scheme, str):
+        return APPROXIMATING[scheme](points)
+    return interpolate_step(points, scheme)
+
+
+class LevelCache:
+    """Every subdivision level computed so far for one control polygon.
+
+    Level k + 1 is always computed from the cached level k, and going back
+    down is a lookup. Levels are kept per scheme, so switching schemes and
+    back does not recompute either; a different control polygon drops them all.
+    """
+
+    def __init__(self):
+        self.control = None
+        self._pyramids = {}  # scheme -> [level 0, level 1, ...]
+
+    def level(self, control, scheme, k):
+        control = as_polygon(control)
+        if self.control is None or not np.array_equal(self.control, control):
+            self.control = control.copy()
+            self._pyramids = {}
+        key = scheme if isinstance(scheme, str) else tuple(scheme)
+        pyramid = self._pyramids.setdefault(key, [self.control])
+        while len(pyramid) <= k:
+            pyramid.append(subdivide_step(pyramid[-1], scheme))
+        return pyramid[k]
+
+    def clear(self):
+        self.control = None
+        self._pyramids = {}
@@ -7,7 +7,8 @@ Conventions:
 - boundary half-edges have .face is None; interior half-edges have a Face object.
 
 This implementation provides a builder from position + face lists and a tiny OBJ
-loader helper that extracts only vertex positions and face indices.
+loader helper that extracts only vertex positions and face indices. The builder
+needs NumPy, twins and boundary loops are matched on arrays.
 """
 
 class Vertex:
@@ -54,129 +55,24 @@ class Mesh:
         faces: iterable of triples of vertex indices (0-based). Polygons should
                be triangulated before calling this.
         """
-        mesh = cls()
-
-        # create vertices
-        for i, p in enumerate(positions):
-            x, y, z = p
-            mesh.vertices.append(Vertex(x, y, z, index=i))
-
-        # create halfedges and faces for each triangle
-        for tri in faces:
-            if len(tri) != 3:
-                raise ValueError("build_from_faces expects triangles (3 indices per face)")
-            a, b, c = tri
-            va = mesh.vertices[a]
-            vb = mesh.vertices[b]
-            vc = mesh.vertices[c]
-
-            he_ab = HalfEdge(origin=va)
-            he_bc = HalfEdge(origin=vb)
-            he_ca = HalfEdge(origin=vc)
-
-            # link next/prev in CCW order
-            he_ab.next, he_ab.prev = he_bc, he_ca
-            he_bc.next, he_bc.prev = he_ca, he_ab
-            he_ca.next, he_ca.prev = he_ab, he_bc
-
-            face = Face(halfedge=he_ab)
-            he_ab.face = he_bc.face = he_ca.face = face
-
-            mesh.halfedges.extend([he_ab, he_bc, he_ca])
-            mesh.faces.append(face)
-
-            # set a representative outgoing halfedge for each vertex
-            if va.halfedge is None:
-                va.halfedge = he_ab
-            if vb.halfedge is None:
-                vb.halfedge = he_bc
-            if vc.halfedge is None:
-                vc.halfedge = he_ca
-
-        # build edge map to match twins
-        edge_map = {}  # key: (min_i,max_i) -> list of (i,j,he)
-        for he in mesh.halfedges:
-            i = he.origin.index
-            j = he.next.origin.index
-            key = (min(i, j), max(i, j))
-            edge_map.setdefault(key, []).append((i, j, he))
-
-        # match twins and create boundary halfedges where needed
-        boundary_halfedges = []
-        for key, entries in edge_map.items():
-            if len(entries) == 2:
-                (i1, j1, he1), (i2, j2, he2) = entries
-                # tie the twins (he1 should be i1->j1 and he2 should be j1->i1)
-                he1.twin = he2
-                he2.twin = he1
-            elif len(entries) == 1:
-                # boundary edge: create a boundary halfedge going opposite direction
-                i, j, he_int = entries[0]  # he_int goes i -> j
-                he_bnd = HalfEdge(origin=mesh.vertices[j])
-                he_bnd.face = None
-                he_bnd.twin = he_int
-                he_int.twin = he_bnd
-                mesh.halfedges.append(he_bnd)
-                boundary_halfedges.append(he_bnd)
-                # ensure vertex has a halfedge
-                if he_bnd.origin.halfedge is None:
-                    he_bnd.origin.halfedge = he_bnd
-            else:
-                raise ValueError(f"Non-manifold edge {key} with {len(entries)} incident halfedges")
-
-        # link boundary halfedges into loops so .next/.prev are defined
-        if boundary_halfedges:
-            # helper: find the next boundary halfedge for a given boundary halfedge
-            for he in list(boundary_halfedges):
-                # start from the interior twin of he and walk twin.next until we hit a boundary halfedge
-                cur = he.twin.next
-                # cur should be an interior halfedge; advance around vertex until we find a boundary
-                loop_guard = 0
-                while cur is not None and cur.face is not None:
-                    cur = cur.twin.next
-                    loop_guard += 1
-                    if loop_guard > len(mesh.halfedges) * 2:
-                        raise RuntimeError("Boundary linking failed (possible inconsistent mesh)")
-                if cur is None:
-                    raise RuntimeError("Could not link boundary halfedge; found None during traversal")
-                # cur is the boundary halfedge that follows he along the boundary
-                he.next = cur
-                cur.prev = he
-
-        return mesh
+        # connectivity is matched on arrays (see half_edge_array), then
+        # turned into objects in one pass
+        from half_edge_array import ArrayMesh
+        return ArrayMesh.build_from_faces(positions, faces).to_mesh(cls)
 
     @classmethod
-    def load_obj(cls, path):
+    def load_obj(cls, path, cache=False):
         """Load an OBJ file and build a half-edge mesh.
 
         Only supports 'v' and 'f' lines. Faces with >3 vertices are fan-triangulated.
-        Negative indices are supported.
+        Negative indices are supported. The file is parsed in bulk by
+        obj_io.read_obj; with cache=True the connected mesh is also kept in a
+        sidecar file next to the OBJ and reused while the OBJ is unchanged.
         """
-        positions = []
-        faces = []
-        with open(path, 'r') as fh:
-            for line in fh:
-                if not line.strip() or line.startswith('#'):
-                    continue
-                parts = line.split()
-                if parts[0] == 'v':
-                    x, y, z = parts[1:4]
-                    positions.append((float(x), float(y), float(z)))
-                elif parts[0] == 'f':
-                    idxs = []
-                    for tok in parts[1:]:
-                        v_str = tok.split('/')[0]
-                        idx = int(v_str)
-                        if idx < 0:
-                            idx = len(positions) + idx
-                        else:
-                            idx = idx - 1
-                        idxs.append(idx)
-                    # triangulate fan
-                    for i in range(1, len(idxs) - 1):
-                        faces.append((idxs[0], idxs[i], idxs[i + 1]))
-
-        return cls.build_from_faces(positions, faces)
+        import obj_io
+        if cache:
+            return obj_io.load_mesh(path).to_mesh(cls)
+        return cls.build_from_faces(*obj_io.read_obj(path))
 
     # ---------------------- utilities ----------------------
     def face_vertices(self, face):
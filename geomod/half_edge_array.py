@@ -0,0 +1,217 @@
+"""Half-edge mesh stored as flat NumPy arrays (struct of arrays).
+
+Same conventions as half_edge.py, with objects replaced by integer ids:
+- vertices, half-edges and faces are numbered from 0, -1 stands for None.
+- origin[h] is the vertex half-edge h points from, its destination is
+  origin[next[h]].
+- vertex_halfedge[v] is an outgoing half-edge of v (-1 for isolated vertices).
+- boundary half-edges have face[h] == -1.
+- build_from_faces lays out the half-edges of face f as 3f (a->b), 3f+1 (b->c)
+  and 3f+2 (c->a), boundary half-edges follow after all interior ones.
+
+A million-triangle mesh takes under 100 MB this way, with no per-element
+Python objects to allocate or chase.
+"""
+
+import numpy as np
+
+from half_edge import Face, HalfEdge, Mesh, Vertex
+
+
+class ArrayMesh:
+    """Container for the position and connectivity arrays."""
+
+    def __init__(self, positions, origin, twin, next, face, vertex_halfedge, face_halfedge):
+        self.positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        self.origin = np.asarray(origin, dtype=np.int32)
+        self.twin = np.asarray(twin, dtype=np.int32)
+        self.next = np.asarray(next, dtype=np.int32)
+        self.face = np.asarray(face, dtype=np.int32)
+        self.vertex_halfedge = np.asarray(vertex_halfedge, dtype=np.int32)
+        self.face_halfedge = np.asarray(face_halfedge, dtype=np.int32)
+
+    @property
+    def prev(self):
+        """prev[h], derived from next on demand."""
+        prev = np.empty_like(self.next)
+        prev[self.next] = np.arange(len(self.next), dtype=np.int32)
+        return prev
+
+    @property
+    def nbytes(self):
+        arrays = (self.positions, self.origin, self.twin, self.next, self.face,
+                  self.vertex_halfedge, self.face_halfedge)
+        return sum(a.nbytes for a in arrays)
+
+    # ---------------------- builders ----------------------
+    @classmethod
+    def build_from_faces(cls, positions, faces):
+        """Build an array mesh from positions and triangular faces.
+
+        positions: (N,3) array or iterable of (x,y,z)
+        faces: (F,3) array or iterable of vertex index triples (0-based)
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 3)
+        try:
+            faces = np.asarray(faces, dtype=np.int32)
+        except ValueError:
+            raise ValueError("build_from_faces expects triangles (3 indices per face)") from None
+        if faces.size == 0:
+            faces = faces.reshape(0, 3)
+        if faces.ndim != 2 or faces.shape[1] != 3:
+            raise ValueError("build_from_faces expects triangles (3 indices per face)")
+        n_faces = len(faces)
+        n_interior = 3 * n_faces
+
+        origin = faces.reshape(-1)
+        destination = faces[:, [1, 2, 0]].reshape(-1)
+        local_next = np.array([1, 2, 0], dtype=np.int32)
+        next = (np.arange(n_faces, dtype=np.int32)[:, None] * 3 + local_next).reshape(-1)
+        face = np.repeat(np.arange(n_faces, dtype=np.int32), 3)
+
+        # match twins: pack each undirected edge into one int64 key and sort,
+        # the half-edges of an edge end up next to each other
+        n_vertices = len(positions)
+        if n_faces and (faces.min() < 0 or faces.max() >= n_vertices):
+            raise ValueError("build_from_faces got a face index outside of positions")
+        keys = np.minimum(origin, destination).astype(np.int64) * n_vertices + np.maximum(origin, destination)
+        order = np.argsort(keys, kind="stable").astype(np.int32)
+        sorted_keys = keys[order]
+        starts = np.flatnonzero(np.r_[True, sorted_keys[1:] != sorted_keys[:-1]])
+        counts = np.diff(np.r_[starts, n_interior])
+
+        bad = np.flatnonzero(counts > 2)
+        if len(bad):
+            key = int(sorted_keys[starts[bad[0]]])
+            raise ValueError(f"Non-manifold edge {divmod(key, n_vertices)} with "
+                             f"{counts[bad[0]]} incident halfedges ({len(bad)} such edges)")
+
+        twin = np.full(n_interior, -1, dtype=np.int32)
+        pairs = starts[counts == 2]
+        twin[order[pairs]] = order[pairs + 1]
+        twin[order[pairs + 1]] = order[pairs]
+        # interior half-edges without a twin, in half-edge order
+        boundary = np.sort(order[starts[counts == 1]])
+
+        # boundary half-edge n_interior + k runs opposite to boundary[k]
+        boundary_ids = np.arange(n_interior, n_interior + len(boundary), dtype=np.int32)
+        origin = np.concatenate((origin, destination[boundary]))
+        twin = np.concatenate((twin, boundary))
+        twin[boundary] = boundary_ids
+        face = np.concatenate((face, np.full(len(boundary), -1, dtype=np.int32)))
+        next = np.concatenate((next, np.full(len(boundary), -1, dtype=np.int32)))
+
+        # link boundary loops: b ends at the origin of its interior twin and is
+        # followed by the boundary half-edge leaving that vertex
+        boundary_origin = origin[boundary_ids]
+        outgoing = np.full(n_vertices, -1, dtype=np.int32)
+        outgoing[boundary_origin] = boundary_ids
+        next[boundary_ids] = outgoing[origin[boundary]]
+        # a vertex where several boundary loops meet has more than one candidate,
+        # turn around it (prev, then twin) to find the one in the same loop
+        shared = np.bincount(boundary_origin, minlength=n_vertices) > 1
+        for b in boundary_ids[shared[origin[boundary]]].tolist():
+            cur = twin[b]
+            for _ in range(len(origin)):
+                if face[cur] < 0:
+                    break
+                cur = twin[cur - cur % 3 + (cur + 2) % 3]
+            else:
+                raise RuntimeError("Boundary linking failed (possible inconsistent mesh)")
+            next[b] = cur
+
+        # first outgoing half-edge of every vertex, interior ones take precedence
+        vertex_halfedge = np.full(n_vertices, -1, dtype=np.int32)
+        first_origin, first = np.unique(origin, return_index=True)
+        vertex_halfedge[first_origin] = first
+
+        face_halfedge = np.arange(0, n_interior, 3, dtype=np.int32)
+        return cls(positions, origin, twin, next, face, vertex_halfedge, face_halfedge)
+
+    @classmethod
+    def load_obj(cls, path, cache=True):
+        """Load an OBJ file, see obj_io.load_mesh."""
+        import obj_io
+        return obj_io.load_mesh(path, cache)
+
+    @classmethod
+    def from_mesh(cls, mesh):
+        """Convert an object-based half_edge.Mesh."""
+        vertex_ids = {id(v): i for i, v in enumerate(mesh.vertices)}
+        he_ids = {id(he): i for i, he in enumerate(mesh.halfedges)}
+        face_ids = {id(f): i for i, f in enumerate(mesh.faces)}
+
+        def he_id(he):
+            return -1 if he is None else he_ids[id(he)]
+
+        positions = [v.pos for v in mesh.vertices]
+        origin = [vertex_ids[id(he.origin)] for he in mesh.halfedges]
+        twin = [he_id(he.twin) for he in mesh.halfedges]
+        next = [he_id(he.next) for he in mesh.halfedges]
+        face = [-1 if he.face is None else face_ids[id(he.face)] for he in mesh.halfedges]
+        vertex_halfedge = [he_id(v.halfedge) for v in mesh.vertices]
+        face_halfedge = [he_id(f.halfedge) for f in mesh.faces]
+        return cls(positions, origin, twin, next, face, vertex_halfedge, face_halfedge)
+
+    def to_mesh(self, mesh_cls=Mesh):
+        """Convert to an object-based half_edge.Mesh with the same numbering."""
+        mesh = mesh_cls()
+        mesh.vertices = [Vertex(x, y, z, index=i) for i, (x, y, z) in enumerate(self.positions.tolist())]
+        mesh.halfedges = [HalfEdge(mesh.vertices[v]) for v in self.origin.tolist()]
+        mesh.faces = [Face(mesh.halfedges[h]) for h in self.face_halfedge.tolist()]
+
+        def lookup(items, i):
+            return None if i < 0 else items[i]
+
+        prev = self.prev
+        for he, t, n, p, f in zip(mesh.halfedges, self.twin.tolist(), self.next.tolist(),
+                                  prev.tolist(), self.face.tolist()):
+            he.twin = lookup(mesh.halfedges, t)
+            he.next = lookup(mesh.halfedges, n)
+            he.prev = lookup(mesh.halfedges, p)
+            he.face = lookup(mesh.faces, f)
+        for v, h in zip(mesh.vertices, self.vertex_halfedge.tolist()):
+            v.halfedge = lookup(mesh.halfedges, h)
+        return mesh
+
+    # ---------------------- utilities ----------------------
+    def face_vertices(self, face):
+        """Return the vertex ids of the given face id."""
+        out = []
+        h0 = int(self.face_halfedge[face])
+        h = h0
+        while True:
+            out.append(int(self.origin[h]))
+            h = int(self.next[h])
+            if h < 0 or h == h0:
+                break
+        return out
+
+    def to_face_indices(self):
+        """Return an (F,3) array of triangle vertex ids."""
+        h0 = self.face_halfedge
+        h1 = self.next[h0]
+        h2 = self.next[h1]
+        return np.column_stack((self.origin[h0], self.origin[h1], self.origin[h2]))
+
+    def vertex_neighbors(self, v):
+        """Return the ids of the vertices around vertex v, in twin/next order."""
+        start = int(self.vertex_halfedge[v])
+        if start < 0:
+            return []
+        out = []
+        h = start
+        for _ in range(len(self.origin)):
+            out.append(int(self.origin[self.next[h]]))
+            t = int(self.twin[h])
+            if t < 0:
+                break
+            h = int(self.next[t])
+            if h < 0 or h == start:
+                break
+        return out
+
+    def is_boundary_edge(self, he):
+        """Return True if half-edge he or its twin has no face."""
+        t = self.twin[he]
+        return bool(self.face[he] < 0 or (t >= 0 and self.face[t] < 0))
@@ -0,0 +1,399 @@
+"""Subdivision of triangle meshes in half-edge form (see half_edge_array).
+
+Every scheme here splits each triangle into four and emits the refined mesh
+directly as an ArrayMesh: the connectivity of the children follows from the
+parent's half-edges, so twins are never matched again and a level costs a
+fixed number of array operations per half-edge.
+
+Input meshes are expected in the build_from_faces layout (face f owns
+half-edges 3f, 3f+1, 3f+2, boundary half-edges come after all of them), and
+the output keeps that layout, so levels can be chained.
+"""
+
+import numpy as np
+
+from half_edge import Mesh
+from half_edge_array import ArrayMesh
+
+
+def _as_array_mesh(mesh):
+    if isinstance(mesh, Mesh):
+        mesh = ArrayMesh.from_mesh(mesh)
+    n_interior = 3 * len(mesh.face_halfedge)
+    in_layout = (
+        np.array_equal(mesh.face_halfedge, np.arange(0, n_interior, 3))
+        and np.array_equal(mesh.next[:n_interior], np.arange(n_interior) - np.arange(n_interior) % 3
+                           + (np.arange(n_interior) + 1) % 3)
+        and (mesh.face[n_interior:] < 0).all()
+    )
+    if not in_layout:
+        mesh = ArrayMesh.build_from_faces(mesh.positions, mesh.to_face_indices())
+    return mesh
+
+
+class Topology:
+    """Per-level index tables shared by every scheme.
+
+    edge_of[h] numbers the undirected edge of half-edge h; edge_halfedge[e]
+    is its interior representative (the lower id of the pair, which is
+    interior because boundary half-edges are numbered last).
+    """
+
+    def __init__(self, mesh):
+        self.mesh = mesh
+        origin, twin, next = mesh.origin, mesh.twin, mesh.next
+        n_halfedges = len(origin)
+        self.n_faces = len(mesh.face_halfedge)
+        self.destination = origin[next]
+
+        representative = np.arange(n_halfedges) < twin
+        self.edge_halfedge = np.flatnonzero(representative).astype(np.int32)
+        edge_of = np.empty(n_halfedges, dtype=np.int32)
+        edge_of[self.edge_halfedge] = np.arange(len(self.edge_halfedge), dtype=np.int32)
+        edge_of[~representative] = edge_of[twin[~representative]]
+        self.edge_of = edge_of
+
+        self.boundary_halfedges = np.arange(3 * self.n_faces, n_halfedges, dtype=np.int32)
+        self.boundary_edge = mesh.face[twin[self.edge_halfedge]] < 0
+        n_vertices = len(mesh.positions)
+        self.boundary_vertex = np.bincount(origin[self.boundary_halfedges], minlength=n_vertices) > 0
+        h = self.edge_halfedge
+        self.valence = np.bincount(np.concatenate((origin[h], self.destination[h])), minlength=n_vertices)
+
+    @staticmethod
+    def _sum_over(ends, others, positions):
+        n_vertices = len(positions)
+        return np.column_stack([
+            np.bincount(ends, weights=positions[others, k], minlength=n_vertices)
+            for k in range(positions.shape[1])
+        ])
+
+    def neighbor_sum(self, positions):
+        """Sum of the neighbours of every vertex, counted once per edge."""
+        # edges rather than outgoing half-edges, so faces wound the wrong way
+        # still count every neighbour once
+        h = self.edge_halfedge
+        ends = np.concatenate((self.mesh.origin[h], self.destination[h]))
+        others = np.concatenate((self.destination[h], self.mesh.origin[h]))
+        return self._sum_over(ends, others, positions)
+
+    def boundary_neighbor_sum(self, positions):
+        """Sum of the neighbours along the boundary, and their count, per vertex."""
+        b = self.boundary_halfedges
+        ends = np.concatenate((self.mesh.origin[b], self.destination[b]))
+        others = np.concatenate((self.destination[b], self.mesh.origin[b]))
+        return self._sum_over(ends, others, positions), np.bincount(ends, minlength=len(positions))
+
+    def refine(self, vertex_positions, edge_positions):
+        """Split every face into four around the given new positions.
+
+        Old vertex v keeps id v, the point on edge e gets id n_vertices + e.
+        Face f becomes corner children 4f + k = (v_k, m_k, m_{k-1}) and the
+        center child 4f + 3 = (m_0, m_1, m_2), where h_k = 3f + k runs from
+        corner v_k to v_{k+1} and m_k is the point on its edge.
+        """
+        mesh = self.mesh
+        n_faces = self.n_faces
+        n_vertices = len(vertex_positions)
+        twin = mesh.twin
+
+        h = np.arange(3 * n_faces, dtype=np.int32).reshape(-1, 3)
+        corners = mesh.origin[h]                 # v_k
+        mids = n_vertices + self.edge_of[h]      # m_k
+        mids_prev = np.roll(mids, 1, axis=1)     # m_{k-1}
+
+        children = np.empty((n_faces, 4, 3), dtype=np.int32)
+        children[:, :3, 0] = corners
+        children[:, :3, 1] = mids
+        children[:, :3, 2] = mids_prev
+        children[:, 3] = mids
+        origin = children.reshape(-1)
+
+        child_face = 4 * np.arange(n_faces, dtype=np.int32)[:, None] + np.arange(3, dtype=np.int32)
+        # parent h_k splits into v_k -> m_k (first half, C_k j=0) and
+        # m_k -> v_{k+1} (second half, C_{k+1} j=2)
+        first_half = 3 * child_face
+        second_half = 3 * np.roll(child_face, -1, axis=1) + 2
+        n_interior = 12 * n_faces
+
+        new_twin = np.empty(n_interior, dtype=np.int32)
+        # inner edges: C_k j=1 (m_k -> m_{k-1}) against center j=k-1
+        inner = 3 * child_face + 1
+        center = 3 * (4 * np.arange(n_faces, dtype=np.int32)[:, None] + 3) + np.roll(np.arange(3), 1)
+        new_twin[inner] = center
+        new_twin[center] = inner
+
+        # halves of interior parent edges pair up crosswise; twins that run
+        # the same way (inconsistently wound faces, like objects/cube.obj)
+        # pair up straight
+        parent = h.reshape(-1)
+        parent_twin = twin[parent]
+        interior = parent_twin < 3 * n_faces
+        first_half = first_half.reshape(-1)
+        second_half = second_half.reshape(-1)
+        parent, parent_twin = parent[interior], parent_twin[interior]
+        flipped = mesh.origin[parent] == mesh.origin[parent_twin]
+        new_twin[first_half[parent]] = np.where(flipped, first_half[parent_twin], second_half[parent_twin])
+        new_twin[second_half[parent]] = np.where(flipped, second_half[parent_twin], first_half[parent_twin])
+
+        # every parent boundary half-edge b splits into origin[b] -> m and m -> destination[b]
+        b = self.boundary_halfedges
+        k = np.arange(len(b), dtype=np.int32)
+        b_first = n_interior + 2 * k
+        b_second = b_first + 1
+        b_parent = twin[b]  # interior, runs the other way
+        new_twin[second_half[b_parent]] = b_first
+        new_twin[first_half[b_parent]] = b_second
+        new_twin = np.concatenate((new_twin, np.empty(2 * len(b), dtype=np.int32)))
+        new_twin[b_first] = second_half[b_parent]
+        new_twin[b_second] = first_half[b_parent]
+
+        b_origin = np.empty(2 * len(b), dtype=np.int32)
+        b_origin[0::2] = mesh.origin[b]
+        b_origin[1::2] = n_vertices + self.edge_of[b]
+        origin = np.concatenate((origin, b_origin))
+
+        n_new_faces = 4 * n_faces
+        local = np.arange(n_interior, dtype=np.int32)
+        new_next = np.empty(len(origin), dtype=np.int32)
+        new_next[:n_interior] = local - local % 3 + (local + 1) % 3
+        new_next[b_first] = b_second
+        new_next[b_second] = n_interior + 2 * (mesh.next[b] - 3 * n_faces)
+
+        face = np.concatenate((np.repeat(np.arange(n_new_faces, dtype=np.int32), 3),
+                               np.full(2 * len(b), -1, dtype=np.int32)))
+
+        # outgoing half-edges: an old vertex takes the first half of its old
+        # one, an edge point its inner half-edge in the representative's face
+        vertex_halfedge = np.full(n_vertices + len(self.edge_halfedge), -1, dtype=np.int32)
+        old = mesh.vertex_halfedge
+        from_face = (old >= 0) & (old < 3 * n_faces)
+        vertex_halfedge[:n_vertices][from_face] = first_half[old[from_face]]
+        from_boundary = old >= 3 * n_faces
+        vertex_halfedge[:n_vertices][from_boundary] = n_interior + 2 * (old[from_boundary] - 3 * n_faces)
+        vertex_halfedge[n_vertices:] = inner.reshape(-1)[self.edge_halfedge]
+
+        positions = np.concatenate((vertex_positions, edge_positions))
+        face_halfedge = np.arange(0, n_interior, 3, dtype=np.int32)
+        return ArrayMesh(positions, origin, new_twin, new_next, face, vertex_halfedge, face_halfedge)
+
+
+def _loop_beta(valence):
+    # Loop's original vertex weight for an interior vertex of the given valence
+    n = np.maximum(valence, 1)
+    return (5 / 8 - (3 / 8 + np.cos(2 * np.pi / n) / 4) ** 2) / n
+
+
+def loop_step(mesh):
+    """One level of Loop subdivision, returns a new ArrayMesh.
+
+    Edge points: 3/8 of the edge's ends plus 1/8 of the two opposite corners,
+    the midpoint on boundary edges. Vertex points: (1 - n beta) v + beta times
+    the sum of the n neighbours inside, 3/4 v + 1/8 of each boundary neighbour
+    on the boundary.
+    """
+    mesh = _as_array_mesh(mesh)
+    topology = Topology(mesh)
+    positions = mesh.positions
+    origin, next, twin = mesh.origin, mesh.next, mesh.twin
+
+    h = topology.edge_halfedge
+    a = positions[origin[h]]
+    b = positions[topology.destination[h]]
+    c = positions[origin[next[next[h]]]]
+    t = twin[h]
+    boundary = topology.boundary_edge
+    # for boundary edges t has no face and next[next[t]] is just another
+    # boundary vertex, its weight is overwritten below
+    d = positions[origin[next[next[t]]]]
+    edge_positions = 3 / 8 * (a + b) + 1 / 8 * (c + d)
+    edge_positions[boundary] = (a[boundary] + b[boundary]) / 2
+
+    valence = topology.valence
+    beta = _loop_beta(valence)[:, None]
+    vertex_positions = (1 - valence[:, None] * beta) * positions + beta * topology.neighbor_sum(positions)
+    total, count = topology.boundary_neighbor_sum(positions)
+    on_boundary = topology.boundary_vertex
+    vertex_positions[on_boundary] = (3 / 4 * positions[on_boundary]
+                                     + 1 / 4 * total[on_boundary] / count[on_boundary, None])
+    isolated = valence == 0
+    vertex_positions[isolated] = positions[isolated]
+
+    return topology.refine(vertex_positions, edge_positions)
+
+
+def loop_subdivide(mesh, levels=1):
+    """Apply loop_step levels times, object meshes are returned as object meshes."""
+    result = _as_array_mesh(mesh)
+    for _ in range(levels):
+        result = loop_step(result)
+    return result.to_mesh(type(mesh)) if isinstance(mesh, Mesh) else result
+
+
+def _ring_weights(k):
+    # modified butterfly weights of the k neighbours of an extraordinary vertex,
+    # starting at the other end of the edge; the vertex itself gets 3/4
+    if k == 3:
+        return np.array([5 / 12, -1 / 12, -1 / 12])
+    if k == 4:
+        return np.array([3 / 8, 0, -1 / 8, 0])
+    j = np.arange(k)
+    return (1 / 4 + np.cos(2 * np.pi * j / k) + np.cos(4 * np.pi * j / k) / 2) / k
+
+
+class ButterflyStencils:
+    """Edge point stencils of the modified Butterfly scheme for one mesh.
+
+    The stencils are stored as one sparse (edge, vertex, weight) table whose
+    weights are base + tension * slope, so edge points for any tension are a
+    single weighted scatter-add and the neighbourhoods are gathered only once.
+
+    Rules, for an edge between a and b with opposite corners c and d:
+    - boundary edge: 4-point scheme along the boundary loop,
+      -w, 1/2 + w, 1/2 + w, -w
+    - a and b interior with valence 6: 1/2 (a + b) + 2w (c + d) - w (wings),
+      the wings being the corners across the other edges of both triangles
+    - a or b interior with another valence: 3/4 on that vertex plus the
+      ring weights of its neighbours, averaged when both ends qualify
+    - anything else (an end on the boundary): (1/2 - w)(a + b) + w (c + d)
+    """
+
+    def __init__(self, mesh):
+        mesh = _as_array_mesh(mesh)
+        self.topology = topology = Topology(mesh)
+        origin, next, twin, face = mesh.origin, mesh.next, mesh.twin, mesh.face
+        h = topology.edge_halfedge
+        n_edges = len(h)
+        t = twin[h]
+        a = origin[h]
+        b = topology.destination[h]
+        c = origin[next[next[h]]]
+        d = origin[next[next[t]]]
+
+        valence = topology.valence
+        interior_vertex = ~topology.boundary_vertex
+        extraordinary = interior_vertex & (valence != 6) & (valence >= 3)
+        boundary = topology.boundary_edge
+        regular = ~boundary & interior_vertex[a] & interior_vertex[b] & (valence[a] == 6) & (valence[b] == 6)
+        ring = ~boundary & ~regular & (extraordinary[a] | extraordinary[b])
+        fallback = ~boundary & ~regular & ~ring
+
+        rows, cols, base, slope = [], [], [], []
+
+        def add(edges, vertices, base_weight, slope_weight):
+            rows.append(edges)
+            cols.append(vertices)
+            base.append(np.broadcast_to(base_weight, edges.shape).astype(np.float64))
+            slope.append(np.broadcast_to(slope_weight, edges.shape).astype(np.float64))
+
+        # boundary edges, along the loop p -> u -> v -> q
+        e = np.flatnonzero(boundary)
+        bh = t[e]
+        u = origin[bh]
+        v = topology.destination[bh]
+        p = origin[mesh.prev[bh]]
+        q = topology.destination[next[bh]]
+        for vertices, base_weight, slope_weight in ((p, 0, -1), (u, 1 / 2, 1), (v, 1 / 2, 1), (q, 0, -1)):
+            add(e, vertices, base_weight, slope_weight)
+
+        # regular interior edges, the 8-point butterfly
+        e = np.flatnonzero(regular)
+        he, te = h[e], t[e]
+        for vertices, base_weight, slope_weight in ((a[e], 1 / 2, 0), (b[e], 1 / 2, 0), (c[e], 0, 2), (d[e], 0, 2)):
+            add(e, vertices, base_weight, slope_weight)
+        for side in (next[he], next[next[he]], next[te], next[next[te]]):
+            add(e, origin[next[next[twin[side]]]], 0, -1)
+
+        # edges at extraordinary vertices
+        e = np.flatnonzero(ring)
+        share = 1 / (extraordinary[a[e]].astype(int) + extraordinary[b[e]])
+        for center, other in ((a, b), (b, a)):
+            sel = extraordinary[center[e]]
+            edges = e[sel]
+            self._add_rings(add, mesh, edges, center[edges], other[edges], face[h[edges]], share[sel], valence)
+
+        # edges with an end on the boundary
+        e = np.flatnonzero(fallback)
+        for vertices, slope_weight in ((a[e], -1), (b[e], -1), (c[e], 1), (d[e], 1)):
+            add(e, vertices, 1 / 2 if slope_weight < 0 else 0, slope_weight)
+
+        self.n_edges = n_edges
+        self.rows = np.concatenate(rows)
+        self.cols = np.concatenate(cols)
+        self.base = np.concatenate(base)
+        self.slope = np.concatenate(slope)
+
+    @staticmethod
+    def _add_rings(add, mesh, edges, center, other, first_face, share, valence):
+        # walk each ring face by face, all rings of the same valence at once
+        corners = mesh.origin[:3 * len(mesh.face_halfedge)].reshape(-1, 3)
+        for k in np.unique(valence[center]).tolist():
+            sel = valence[center] == k
+            e, v, g, s = edges[sel], center[sel], first_face[sel], share[sel]
+            weights = _ring_weights(k)
+            add(e, v, 3 / 4 * s, 0)
+            neighbor = other[sel]
+            for j in range(k):
+                add(e, neighbor, weights[j] * s, 0)
+                if j == k - 1:
+                    break
+                # the third corner of face g is the next neighbour, then cross
+                # the edge (v, next neighbour), the one opposite to the
+                # previous neighbour, into the following face
+                g_corners = corners[g]
+                previous = neighbor
+                neighbor = g_corners.sum(axis=1) - v - previous
+                opposite = np.argmax(g_corners == previous[:, None], axis=1)
+                g = mesh.face[mesh.twin[3 * g + (opposite + 1) % 3]]
+
+    def edge_points(self, positions, tension=1 / 16):
+        weights = self.base + tension * self.slope
+        return np.column_stack([
+            np.bincount(self.rows, weights=weights * positions[self.cols, k], minlength=self.n_edges)
+            for k in range(positions.shape[1])
+        ])
+
+
+class Butterfly:
+    """Modified Butterfly subdivision with the stencils of every level kept.
+
+    Connectivity and stencils do not depend on the positions, so they are
+    built once per level and reused by every call to subdivide, whatever
+    tension it asks for; only the scatter-adds of the edge points are redone.
+    """
+
+    def __init__(self, mesh):
+        self.mesh = _as_array_mesh(mesh)
+        self._levels = []  # (ButterflyStencils, refined connectivity)
+
+    def _level(self, k):
+        while len(self._levels) <= k:
+            parent = self._levels[-1][1] if self._levels else self.mesh
+            stencils = ButterflyStencils(parent)
+            # positions are filled in by subdivide, only the arrays are kept
+            refined = stencils.topology.refine(parent.positions, np.zeros((stencils.n_edges, 3)))
+            self._levels.append((stencils, refined))
+        return self._levels[k]
+
+    def subdivide(self, levels=1, tension=1 / 16):
+        """Return the ArrayMesh levels steps down, old vertices are interpolated."""
+        result = self.mesh
+        positions = self.mesh.positions
+        for k in range(levels):
+            stencils, result = self._level(k)
+            positions = np.concatenate((positions, stencils.edge_points(positions, tension)))
+        if levels == 0:
+            return result
+        return ArrayMesh(positions, result.origin, result.twin, result.next, result.face,
+                         result.vertex_halfedge, result.face_halfedge)
+
+
+def butterfly_step(mesh, tension=1 / 16):
+    """One level of modified Butterfly subdivision, returns a new ArrayMesh."""
+    return Butterfly(mesh).subdivide(1, tension)
+
+
+def butterfly_subdivide(mesh, levels=1, tension=1 / 16):
+    """Apply the modified Butterfly scheme levels times, object meshes are returned as object meshes."""
+    result = Butterfly(mesh).subdivide(levels, tension)
+    return result.to_mesh(type(mesh)) if isinstance(mesh, Mesh) else result
@@ -0,0 +1,232 @@
+"""Bulk OBJ reader and a memory-mappable binary cache of the built mesh.
+
+read_obj handles the same subset as the old line by line Mesh.load_obj ('v'
+and 'f' lines, fan triangulation, negative indices) but works on large chunks
+of the file: the 'v' and 'f' lines of a chunk are cut out with byte masks and
+all their numbers are parsed by NumPy in one call.
+
+load_mesh keeps the parsed and connected mesh in a sidecar file next to the
+OBJ (path + CACHE_SUFFIX) and reuses it while the OBJ's size and mtime match.
+"""
+
+import mmap
+import os
+import re
+import struct
+
+import numpy as np
+
+from half_edge_array import ArrayMesh
+
+CHUNK_SIZE = 1 << 24
+CACHE_SUFFIX = ".hemesh"
+
+# "7/1/3" -> "7": only the position index of a face corner is used
+_CORNER_EXTRA = re.compile(rb"/[^ \t\r\n]*")
+_SPACE = np.zeros(256, dtype=bool)
+_SPACE[list(b" \t\r\n")] = True
+
+
+def _token_counts(text):
+    # numbers per line of a block of newline terminated lines, counted on the
+    # raw bytes: tokens starting before each newline, minus the previous lines'
+    data = np.frombuffer(text, dtype=np.uint8)
+    space = data <= ord(" ")
+    token_starts = np.flatnonzero(space[:-1] & ~space[1:]) + 1
+    newlines = np.flatnonzero(data == ord("\n"))
+    return np.diff(np.searchsorted(token_starts, newlines), prepend=0)
+
+
+def _parse(text, dtype):
+    """Parse the numbers of a block of newline terminated lines.
+
+    Returns (values, numbers per line or None if every line holds exactly 3).
+    Raises ValueError for a line with fewer than 3 numbers or a token that is
+    not a number.
+    """
+    try:
+        values = np.fromstring(text, dtype=dtype, sep=" ")
+    except ValueError:
+        values = None
+    counts = _token_counts(text)
+    if values is None or len(values) != counts.sum() or (counts < 3).any():
+        raise ValueError("Malformed 'v' or 'f' line in OBJ file")
+    if (counts == 3).all():
+        return values, None
+    return values, counts
+
+
+def _fan(values, counts):
+    # fan-triangulate polygons whose indices are concatenated in values
+    if counts is None:
+        return values.reshape(-1, 3)
+    offsets = np.cumsum(counts) - counts
+    fan = counts - 2
+    polygon = np.repeat(np.arange(len(counts)), fan)
+    corner = np.arange(fan.sum()) - np.repeat(np.cumsum(fan) - fan, fan) + 1
+    first = offsets[polygon]
+    return np.column_stack((values[first], values[first + corner], values[first + corner + 1]))
+
+
+def _read_chunk(chunk, vertex_count):
+    # classify lines by their first two non-blank bytes and cut the 'v' and
+    # 'f' lines out of the chunk with byte masks, the keyword itself becomes
+    # a space
+    buf = np.frombuffer(chunk + b"\n ", dtype=np.uint8)
+    ends = np.flatnonzero(buf[:-1] == ord("\n"))
+    starts = np.r_[0, ends[:-1] + 1]
+    keyword = starts.copy()
+    indented = np.flatnonzero((buf[starts] == ord(" ")) | (buf[starts] == ord("\t")))
+    while len(indented):
+        # step over leading blanks, never past the newline
+        keyword[indented] += 1
+        next_byte = buf[keyword[indented]]
+        indented = indented[(next_byte == ord(" ")) | (next_byte == ord("\t"))]
+    first = buf[keyword]
+    separated = _SPACE[buf[keyword + 1]] & (buf[keyword + 1] != ord("\n"))
+    is_vertex = (first == ord("v")) & separated
+    is_face = (first == ord("f")) & separated
+    kind = np.repeat(is_vertex.astype(np.uint8) + 2 * is_face, ends - starts + 1)
+    buf = buf[:-1].copy()
+    buf[keyword[is_vertex | is_face]] = ord(" ")
+
+    positions = np.empty((0, 3))
+    n_vertices = int(is_vertex.sum())
+    if n_vertices:
+        values, counts = _parse(buf[kind == 1].tobytes(), np.float64)
+        if counts is None:
+            positions = values.reshape(-1, 3)
+        else:
+            # extra numbers (w or vertex colors) are dropped
+            offsets = np.cumsum(counts) - counts
+            positions = values[offsets[:, None] + np.arange(3)]
+
+    triangles = np.empty((0, 3), dtype=np.int64)
+    n_faces = int(is_face.sum())
+    if n_faces:
+        text = buf[kind == 2].tobytes()
+        if b"/" in text:
+            text = _CORNER_EXTRA.sub(b"", text)
+        values, counts = _parse(text, np.int64)
+        if (values < 0).any():
+            # negative indices count back from the vertices read so far
+            before = vertex_count + np.cumsum(is_vertex)[is_face]
+            before = np.repeat(before, 3 if counts is None else counts)
+            values = np.where(values < 0, before + values, values - 1)
+        else:
+            values = values - 1
+        triangles = _fan(values, counts)
+    return positions, triangles
+
+
+def read_obj(path, chunk_size=CHUNK_SIZE):
+    """Return (positions (N,3) float64, triangles (F,3) int32) of an OBJ file."""
+    positions = []
+    triangles = []
+    vertex_count = 0
+    rest = b""
+    with open(path, "rb") as fh:
+        while True:
+            data = fh.read(chunk_size)
+            chunk = rest + data
+            if data:
+                # only whole lines are parsed, the tail waits for the next chunk
+                cut = chunk.rfind(b"\n") + 1
+                chunk, rest = chunk[:cut], chunk[cut:]
+            if chunk:
+                chunk_positions, chunk_triangles = _read_chunk(chunk, vertex_count)
+                positions.append(chunk_positions)
+                triangles.append(chunk_triangles)
+                vertex_count += len(chunk_positions)
+            if not data:
+                break
+    positions = np.concatenate(positions) if positions else np.empty((0, 3))
+    triangles = np.concatenate(triangles) if triangles else np.empty((0, 3), dtype=np.int64)
+    return positions, triangles.astype(np.int32)
+
+
+# cache file, version 1 (little endian):
+#
+# header: magic b"HEMC", version u32, OBJ size u64, OBJ mtime ns i64,
+#         vertex count u64, triangle count u64, half-edge count u64
+# arrays: positions f8 (N,3), then i4: origin, twin, next, face (H),
+#         vertex_halfedge (N); each starts at a multiple of 8
+#
+# The triangles are not stored: face f is half-edges 3f, 3f+1, 3f+2, so
+# origin[:3F].reshape(F, 3) is the triangle index array.
+
+CACHE_MAGIC = b"HEMC"
+CACHE_VERSION = 1
+CACHE_HEADER = struct.Struct("<4sIQqQQQ")
+
+
+def _cache_layout(n_vertices, n_halfedges):
+    shapes = [
+        ("positions", np.float64, (n_vertices, 3)),
+        ("origin", np.int32, (n_halfedges,)),
+        ("twin", np.int32, (n_halfedges,)),
+        ("next", np.int32, (n_halfedges,)),
+        ("face", np.int32, (n_halfedges,)),
+        ("vertex_halfedge", np.int32, (n_vertices,)),
+    ]
+    offset = CACHE_HEADER.size
+    layout = []
+    for name, dtype, shape in shapes:
+        offset = (offset + 7) // 8 * 8
+        layout.append((name, dtype, shape, offset))
+        offset += int(np.prod(shape)) * np.dtype(dtype).itemsize
+    return layout
+
+
+def _write_cache(cache_path, stat, mesh):
+    header = CACHE_HEADER.pack(CACHE_MAGIC, CACHE_VERSION, stat.st_size, stat.st_mtime_ns,
+                               len(mesh.positions), len(mesh.face_halfedge), len(mesh.origin))
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        for name, dtype, shape, offset in _cache_layout(len(mesh.positions), len(mesh.origin)):
+            f.write(bytes(offset - f.tell()))
+            f.write(np.ascontiguousarray(getattr(mesh, name), dtype=dtype).tobytes())
+    # replaced in one step, a reader never maps a half written cache
+    os.replace(tmp_path, cache_path)
+
+
+def _read_cache(cache_path, stat):
+    try:
+        fh = open(cache_path, "rb")
+    except FileNotFoundError:
+        return None
+    with fh:
+        if os.fstat(fh.fileno()).st_size < CACHE_HEADER.size:
+            return None
+        data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    magic, version, size, mtime, n_vertices, n_triangles, n_halfedges = CACHE_HEADER.unpack_from(data, 0)
+    if (magic, version, size, mtime) != (CACHE_MAGIC, CACHE_VERSION, stat.st_size, stat.st_mtime_ns):
+        data.close()
+        return None
+    # the arrays are read-only views of the mapping, nothing is copied
+    arrays = {
+        name: np.frombuffer(data, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+        for name, dtype, shape, offset in _cache_layout(n_vertices, n_halfedges)
+    }
+    face_halfedge = np.arange(0, 3 * n_triangles, 3, dtype=np.int32)
+    return ArrayMesh(arrays["positions"], arrays["origin"], arrays["twin"], arrays["next"],
+                     arrays["face"], arrays["vertex_halfedge"], face_halfedge)
+
+
+def load_mesh(path, cache=True):
+    """Return the ArrayMesh of an OBJ file, through the sidecar cache if enabled."""
+    stat = os.stat(path)
+    cache_path = path + CACHE_SUFFIX
+    if cache:
+        cached = _read_cache(cache_path, stat)
+        if cached is not None:
+            return cached
+    positions, triangles = read_obj(path)
+    mesh = ArrayMesh.build_from_faces(positions, triangles)
+    if cache:
+        try:
+            _write_cache(cache_path, stat, mesh)
+        except OSError:
+            pass  # e.g. a read-only asset directory, the mesh is still usable
+    return mesh
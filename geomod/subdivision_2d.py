@@ -1,4 +1,5 @@
 import pygame
+import curve_subdivision
 
 BLACK = (0, 0, 0)
 RED = (255, 0, 0)
@@ -13,8 +14,9 @@ weights4 = [-1 / 24, 13 / 24, 13 / 24, -1 / 24]
 iterations = 0
 # if not interpolate then approximate
 interpolate = True
-save_original = True
-original_points = []
+approximating_scheme = "chaikin"
+# every computed level of the current points, see curve_subdivision.LevelCache
+levels = curve_subdivision.LevelCache()
 
 
 def place_point(pos):
@@ -24,54 +26,26 @@ def place_point(pos):
         pygame.draw.lines(screen, WHITE, False, points, 2)
 
 
-def subdivision(points=points, weights=current_weight):
+def subdivision(points=None, weights=None):
+    if points is None:
+        points = globals()["points"]
+    if weights is None:
+        weights = current_weight
+    if len(points) < 2:
+        return
     if interpolate:
         interpolate_subdivision(points, weights)
     else:
-        aproximate_subdivision(points, weights)
+        aproximate_subdivision(points, approximating_scheme)
 
 
 def interpolate_subdivision(points, weights=current_weight):
-    for _ in range(iterations):
-        new_points = []
-        for i in range(len(points)):
-            p0 = points[i - 1]
-            p1 = points[i]
-            p2 = points[(i + 1) % len(points)]
-            p3 = points[(i + 2) % len(points)]
+    # stepping the level up or down reuses the cached levels
+    redraw(levels.level(points, weights, iterations).tolist())
 
-            new_x = (
-                weights[0] * p0[0]
-                + weights[1] * p1[0]
-                + weights[2] * p2[0]
-                + weights[3] * p3[0]
-            )
-            new_y = (
-                weights[0] * p0[1]
-                + weights[1] * p1[1]
-                + weights[2] * p2[1]
-                + weights[3] * p3[1]
-            )
 
-            new_points.append((new_x, new_y))
-
-        points = merge_points(points, new_points)
-        redraw(points)
-
-
-def merge_points(points, new_points):
-    merged = []
-    for p, np in zip(points, new_points):
-        merged.append(p)
-        merged.append(np)
-
-    longer = points if len(points) > len(new_points) else new_points
-    merged.extend(longer[len(merged) // 2 :])
-    return merged
-
-
-def aproximate_subdivision(points, weights=current_weight):
-    pass
+def aproximate_subdivision(points, scheme="chaikin"):
+    redraw(levels.level(points, scheme, iterations).tolist())
 
 
 def redraw(points):
@@ -94,6 +68,7 @@ if __name__ == "__main__":
     print("O to connect first and last points.")
     print("S to increase subdivision level, A to decrease.")
     print("R to toggle between interpolate and approximate.")
+    print("B to toggle the approximating scheme (Chaikin / cubic B-spline).")
     print("W to change weights")
     print("Press ESC to exit.")
     print("****************************************************************")
@@ -118,7 +93,8 @@ if __name__ == "__main__":
             # C
             if event.type == pygame.KEYDOWN and event.key == pygame.K_c:
                 points = []
-                save_original = True
+                iterations = 0
+                levels.clear()
                 screen.fill(BLACK)
                 print("Cleared all points.")
 
@@ -133,9 +109,6 @@ if __name__ == "__main__":
             # A and S
             if event.type == pygame.KEYDOWN and event.key == pygame.K_s:
                 iterations += 1
-                if save_original:
-                    original_points = points.copy()
-                    save_original = False
                 print(f"Increased subdivision level to {iterations}.")
                 subdivision(points, current_weight)
 
@@ -147,10 +120,7 @@ if __name__ == "__main__":
                 iterations -= 1
                 print(f"Decreased subdivision level to {iterations}.")
 
-                if iterations > 0:
-                    subdivision(points, current_weight)
-                else:
-                    redraw(original_points)
+                subdivision(points, current_weight)
             # R
             if event.type == pygame.KEYDOWN and event.key == pygame.K_r:
                 interpolate = not interpolate
@@ -158,6 +128,13 @@ if __name__ == "__main__":
                 print(f"Subdivision mode set to {mode}.")
                 subdivision()
 
+            # B
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_b:
+                approximating_scheme = "bspline" if approximating_scheme == "chaikin" else "chaikin"
+                print(f"Approximating scheme set to {approximating_scheme}.")
+                if not interpolate:
+                    subdivision()
+
             # W
             if event.type == pygame.KEYDOWN and event.key == pygame.K_w:
                 if current_weight == weights1:
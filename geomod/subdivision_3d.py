@@ -9,20 +9,158 @@
 
 # use pyglet or moderngl
 
+import sys
+
+import numpy as np
 import pyglet
 import moderngl
 
+from half_edge_array import ArrayMesh
+from mesh_subdivision import Butterfly, loop_step
+
+VERTEX_SHADER = """
+#version 330
+uniform mat4 mvp;
+in vec3 position;
+void main() {
+    gl_Position = mvp * vec4(position, 1.0);
+}
+"""
+
+FRAGMENT_SHADER = """
+#version 330
+out vec4 color;
+void main() {
+    color = vec4(1.0, 1.0, 1.0, 1.0);
+}
+"""
+
+
+def wireframe(mesh):
+    """Vertex positions and line index pairs (one per edge) of an ArrayMesh."""
+    representative = np.flatnonzero(np.arange(len(mesh.origin)) < mesh.twin)
+    lines = np.column_stack((mesh.origin[representative], mesh.origin[mesh.next[representative]]))
+    return mesh.positions.astype("f4"), lines.astype("i4")
+
+
+def perspective(fov_y, aspect, near, far):
+    f = 1 / np.tan(np.radians(fov_y) / 2)
+    return np.array([
+        [f / aspect, 0, 0, 0],
+        [0, f, 0, 0],
+        [0, 0, (far + near) / (near - far), 2 * far * near / (near - far)],
+        [0, 0, -1, 0],
+    ])
+
+
+def rotation(yaw, pitch):
+    cy, sy = np.cos(yaw), np.sin(yaw)
+    cp, sp = np.cos(pitch), np.sin(pitch)
+    around_y = np.array([[cy, 0, sy, 0], [0, 1, 0, 0], [-sy, 0, cy, 0], [0, 0, 0, 1]])
+    around_x = np.array([[1, 0, 0, 0], [0, cp, -sp, 0], [0, sp, cp, 0], [0, 0, 0, 1]])
+    return around_x @ around_y
+
+
+class Viewer:
+    """Keeps every computed level, S goes one level up, A one down.
+
+    Loop levels are cached as meshes. Butterfly keeps its stencils per level,
+    so changing the tension only recomputes the edge points.
+    """
+
+    def __init__(self, mesh):
+        self.loop_levels = [mesh]
+        self.butterfly = Butterfly(mesh)
+        self.scheme = "loop"
+        self.tension = 1 / 16
+        self.level = 0
+        self.mesh = mesh
+        self.yaw = 0.6
+        self.pitch = 0.4
+        # fit the model in view
+        positions = mesh.positions
+        self.center = (positions.min(axis=0) + positions.max(axis=0)) / 2
+        self.radius = max(np.linalg.norm(positions - self.center, axis=1).max(), 1e-6)
+        self.vao = None
+
+    def set_level(self, level):
+        self.level = max(0, level)
+        if self.scheme == "loop":
+            while len(self.loop_levels) <= self.level:
+                self.loop_levels.append(loop_step(self.loop_levels[-1]))
+            self.mesh = self.loop_levels[self.level]
+        else:
+            self.mesh = self.butterfly.subdivide(self.level, self.tension)
+        self.vao = None
+        print(f"{self.scheme} level {self.level}: {len(self.mesh.face_halfedge)} faces")
+
+    def mvp(self, aspect):
+        model = np.eye(4)
+        model[:3, 3] = -self.center
+        view = np.eye(4)
+        view[2, 3] = -3 * self.radius
+        projection = perspective(45, aspect, self.radius / 10, self.radius * 10)
+        return projection @ view @ rotation(self.yaw, self.pitch) @ model
+
+    def draw(self, ctx, program, aspect):
+        if self.vao is None:
+            positions, lines = wireframe(self.mesh)
+            vbo = ctx.buffer(positions.tobytes())
+            ibo = ctx.buffer(lines.tobytes())
+            self.vao = ctx.vertex_array(program, [(vbo, "3f", "position")], ibo)
+        # moderngl expects column-major matrices
+        program["mvp"].write(self.mvp(aspect).T.astype("f4").tobytes())
+        self.vao.render(moderngl.LINES)
 
 
 if __name__ == "__main__":
-    window = pyglet.window.Window(800, 600, "3D Subdivision")
-    vertices, faces = load_obj("path/to/your.obj")
+    path = sys.argv[1] if len(sys.argv) > 1 else "objects/cube.obj"
+    window = pyglet.window.Window(800, 600, "3D Subdivision", resizable=True)
+    viewer = Viewer(ArrayMesh.load_obj(path))
+
+    print("****************************************************************")
+    print(f"Loaded {path}: {len(viewer.mesh.positions)} vertices, {len(viewer.mesh.face_halfedge)} faces")
+    print("Drag with the left mouse button to rotate.")
+    print("S to increase subdivision level, A to decrease.")
+    print("B to toggle between Loop and Butterfly.")
+    print("T to increase Butterfly tension, G to decrease.")
+    print("Press ESC to exit.")
+    print("****************************************************************")
 
     @window.event
     def on_draw():
         if not hasattr(window, "mctx"):
             window.mctx = moderngl.create_context()
+            window.program = window.mctx.program(vertex_shader=VERTEX_SHADER,
+                                                 fragment_shader=FRAGMENT_SHADER)
             print("Created moderngl context:", window.mctx)
         window.clear()
+        width, height = window.get_framebuffer_size()
+        window.mctx.viewport = (0, 0, width, height)
+        viewer.draw(window.mctx, window.program, width / max(height, 1))
+
+    @window.event
+    def on_mouse_drag(x, y, dx, dy, buttons, modifiers):
+        if buttons & pyglet.window.mouse.LEFT:
+            viewer.yaw += dx * 0.01
+            viewer.pitch -= dy * 0.01
+
+    @window.event
+    def on_key_press(symbol, modifiers):
+        if symbol == pyglet.window.key.S:
+            viewer.set_level(viewer.level + 1)
+        elif symbol == pyglet.window.key.A:
+            if viewer.level == 0:
+                print("Subdivision level cannot be less than 0.")
+            else:
+                viewer.set_level(viewer.level - 1)
+        elif symbol == pyglet.window.key.B:
+            viewer.scheme = "butterfly" if viewer.scheme == "loop" else "loop"
+            viewer.set_level(viewer.level)
+        elif symbol in (pyglet.window.key.T, pyglet.window.key.G):
+            viewer.tension += 1 / 64 if symbol == pyglet.window.key.T else -1 / 64
+            print(f"Butterfly tension set to {viewer.tension:.4f}.")
+            if viewer.scheme == "butterfly":
+                viewer.set_level(viewer.level)
 
-    pyglet.app.run()
\ No newline at end of file
+    pyglet.app.run()
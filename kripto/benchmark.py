@@ -0,0 +1,278 @@
+import json
+import os
+import platform
+import random
+import secrets
+import sys
+import tempfile
+import time
+from util import codec
+from util.block import Block
+from util.blockchain import Blockchain
+from util.keyring import keyring
+from util.keystore import Keystore
+from util.network import simulate
+from util.transaction import Transaction
+from util.utils import generate_merkle_root
+
+
+def bench_mining(difficulty=4, rounds=3, max_workers=None):
+    # hashes/second is estimated from the winning nonce, which is the number
+    # of attempts a sequential miner needs for the same block
+    max_workers = max_workers or os.cpu_count() or 1
+    worker_counts = sorted({1, *[w for w in (2, 4, 8, 16) if w <= max_workers], max_workers})
+    print(f"Mining benchmark, difficulty {difficulty}, {rounds} blocks per run")
+    print("=" * 50)
+    base_rate = None
+    for workers in worker_counts:
+        attempts = 0
+        elapsed = 0.0
+        for i in range(rounds):
+            block = Block(i + 1, "0" * 64, [])
+            start = time.perf_counter()
+            block.mine(difficulty, workers)
+            elapsed += time.perf_counter() - start
+            assert block.validate(difficulty)
+            attempts += block.nonce + 1
+        rate = attempts / elapsed
+        base_rate = base_rate or rate
+        print(f"  workers={workers:<3} {rate:>12,.0f} hashes/s  x{rate / base_rate:.2f}")
+    print("=" * 50)
+
+
+def _random_block(tx_count):
+    # signatures are random DER-sized bytes, no keys are needed to encode
+    users = ["alice", "bob", "cecil", "dave"]
+    transactions = [
+        Transaction.from_dict({
+            "sender": random.choice(users),
+            "receiver": random.choice(users),
+            "amount": str(random.randint(1, 1000)),
+            "signature": secrets.token_hex(71),
+        })
+        for _ in range(tx_count)
+    ]
+    block = Block(1, secrets.token_hex(32), transactions)
+    block.nonce = random.randint(0, 1 << 32)
+    return block
+
+
+def _time_per_call(fn, arg, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(arg)
+    return (time.perf_counter() - start) / repeat
+
+
+def bench_serialization(tx_count=1000, repeat=20):
+    block = _random_block(tx_count)
+    formats = {
+        "json": (
+            lambda b: json.dumps(b.to_dict(), sort_keys=True).encode(),
+            lambda data: Block.from_dict(json.loads(data)),
+        ),
+        "binary": (codec.encode_block, codec.decode_block),
+    }
+    print(f"Serialization benchmark, block with {tx_count} transactions")
+    print("=" * 50)
+    for name, (encode, decode) in formats.items():
+        data = encode(block)
+        assert decode(data).calculate_hash() == block.calculate_hash()
+        encode_time = _time_per_call(encode, block, repeat)
+        decode_time = _time_per_call(decode, data, repeat)
+        print(f"  {name:<7} {len(data):>9,} bytes  "
+              f"encode {encode_time * 1000:8.2f} ms  decode {decode_time * 1000:8.2f} ms")
+    print("=" * 50)
+
+
+def _rate(count, elapsed):
+    return count / elapsed if elapsed > 0 else float("inf")
+
+
+def _build_chain(length, difficulty, txs_per_block, users):
+    # fixed difficulty, retargeting would raise it as the chain grows
+    blockchain = Blockchain(initial_balance=10**12, difficulty=difficulty, retarget_interval=None)
+    blockchain.verbose = False
+    for _ in range(length):
+        items = [(random.choice(users), random.choice(users), str(random.randint(1, 10**6)))
+                 for _ in range(txs_per_block)]
+        blockchain.add_transactions(items)
+        blockchain.mine_block()
+    return blockchain
+
+
+def run_suite(users=20, transactions=2000, difficulties=(2, 3, 4), chain_lengths=(10, 50, 100),
+              merkle_sizes=(10, 100, 1000), seed=None):
+    """Synthetic workload over every hot path, returns a JSON-serializable report."""
+    random.seed(seed)
+    report = {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.time(),
+        "params": {"users": users, "transactions": transactions},
+    }
+
+    with tempfile.TemporaryDirectory() as keys_dir:
+        user_ids = [f"user{i}" for i in range(users)]
+        start = time.perf_counter()
+        keystore = Keystore.create(os.path.join(keys_dir, "keystore"), user_ids)
+        report["keygen_per_sec"] = _rate(users, time.perf_counter() - start)
+
+        old_keystore = keyring.keystore
+        keyring.use_keystore(keystore)
+        try:
+            items = [(random.choice(user_ids), random.choice(user_ids), str(random.randint(1, 1000)))
+                     for _ in range(transactions)]
+            start = time.perf_counter()
+            signed = [Transaction(*item) for item in items]
+            report["signed_per_sec"] = _rate(len(signed), time.perf_counter() - start)
+
+            start = time.perf_counter()
+            assert all(tx.verify_signature(verbose=False) for tx in signed)
+            report["verified_per_sec"] = _rate(len(signed), time.perf_counter() - start)
+
+            report["merkle_roots_per_sec"] = {}
+            for size in merkle_sizes:
+                txs = signed[:size]
+                repeat = max(1, 2000 // len(txs))
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    generate_merkle_root(txs)
+                report["merkle_roots_per_sec"][str(len(txs))] = _rate(repeat, time.perf_counter() - start)
+
+            report["mining_hashes_per_sec"] = {}
+            for difficulty in difficulties:
+                attempts = 0
+                elapsed = 0.0
+                for i in range(3):
+                    block = Block(i + 1, secrets.token_hex(32), signed[:10])
+                    start = time.perf_counter()
+                    block.mine(difficulty)
+                    elapsed += time.perf_counter() - start
+                    attempts += block.nonce + 1
+                report["mining_hashes_per_sec"][str(difficulty)] = _rate(attempts, elapsed)
+
+            report["validate_chain_seconds"] = {}
+            for length in chain_lengths:
+                blockchain = _build_chain(length, 1, 5, user_ids)
+                # mining memoized every block hash, drop them so each one is
+                # really recomputed
+                for block in blockchain.chain:
+                    block._hash = None
+                start = time.perf_counter()
+                blockchain.validate_chain(full=True)
+                report["validate_chain_seconds"][str(length)] = time.perf_counter() - start
+        finally:
+            keyring.use_keystore(old_keystore)
+            keystore.close()
+    return report
+
+
+def print_report(report):
+    print(f"Benchmark suite ({report['params']['users']} users, "
+          f"{report['params']['transactions']} transactions)")
+    print("=" * 50)
+    print(f"  keys generated/s      {report['keygen_per_sec']:>12,.0f}")
+    print(f"  transactions signed/s {report['signed_per_sec']:>12,.0f}")
+    print(f"  signatures verified/s {report['verified_per_sec']:>12,.0f}")
+    for size, rate in report["merkle_roots_per_sec"].items():
+        print(f"  merkle roots/s ({size:>5} txs) {rate:>10,.0f}")
+    for difficulty, rate in report["mining_hashes_per_sec"].items():
+        print(f"  hashes/s (difficulty {difficulty})  {rate:>10,.0f}")
+    for length, seconds in report["validate_chain_seconds"].items():
+        print(f"  validate_chain ({length:>5} blocks) {seconds * 1000:>8.2f} ms")
+    print("=" * 50)
+
+
+def bench_network(node_counts=(1, 2, 4, 8), duration=5.0, difficulty=3, tx_rate=200, seed=None):
+    print(f"Network simulation, difficulty {difficulty}, {duration:.0f}s per run")
+    print("=" * 50)
+    results = []
+    for count in node_counts:
+        result = simulate(count, duration, difficulty, tx_rate=tx_rate, seed=seed)
+        results.append(result)
+        propagation = result["propagation_mean_ms"]
+        propagation = f"{propagation:7.1f} ms" if propagation is not None else "      - ms"
+        print(f"  nodes={count:<3} height {result['height']:<4} stale {result['stale_blocks']:<3} "
+              f"reorgs {result['reorgs']:<3} {result['committed_tx_per_sec']:7.1f} tx/s  "
+              f"propagation {propagation}  converged {result['converged']}")
+    print("=" * 50)
+    return results
+
+
+def _flatten(report, prefix=""):
+    for key, value in report.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, (int, float)) and key not in ("timestamp", "cpu_count"):
+            yield f"{prefix}{key}", value
+
+
+def compare_reports(old_path, new_path):
+    with open(old_path) as f:
+        old = dict(_flatten(json.load(f)))
+    with open(new_path) as f:
+        new = dict(_flatten(json.load(f)))
+    print(f"Comparing {old_path} -> {new_path}")
+    print("=" * 50)
+    for name in sorted(old.keys() & new.keys()):
+        if old[name]:
+            print(f"  {name:<40} x{new[name] / old[name]:.2f}")
+    print("=" * 50)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Blockchain benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+
+    mining = sub.add_parser("mining", help="hashes/second per number of mining processes")
+    mining.add_argument("--difficulty", type=int, default=4)
+    mining.add_argument("--rounds", type=int, default=3)
+    mining.add_argument("--workers", type=int, default=None, help="highest worker count to try")
+
+    serialization = sub.add_parser("serialization", help="binary codec vs JSON size and speed")
+    serialization.add_argument("--transactions", type=int, default=1000)
+    serialization.add_argument("--repeat", type=int, default=20)
+
+    suite = sub.add_parser("suite", help="synthetic workload over signing, merkle, mining and validation")
+    suite.add_argument("--users", type=int, default=20)
+    suite.add_argument("--transactions", type=int, default=2000)
+    suite.add_argument("--difficulties", type=int, nargs="+", default=[2, 3, 4])
+    suite.add_argument("--chain-lengths", type=int, nargs="+", default=[10, 50, 100])
+    suite.add_argument("--seed", type=int, default=None)
+    suite.add_argument("--json", default=None, help="write the report to this file ('-' for stdout)")
+
+    network = sub.add_parser("network", help="asyncio multi-node simulation with block propagation")
+    network.add_argument("--nodes", type=int, nargs="+", default=[1, 2, 4, 8])
+    network.add_argument("--duration", type=float, default=5.0)
+    network.add_argument("--difficulty", type=int, default=3)
+    network.add_argument("--tx-rate", type=float, default=200, help="transactions generated per second")
+    network.add_argument("--seed", type=int, default=None)
+
+    compare = sub.add_parser("compare", help="ratio of every metric between two suite reports")
+    compare.add_argument("old")
+    compare.add_argument("new")
+
+    args = parser.parse_args()
+    if args.bench == "compare":
+        compare_reports(args.old, args.new)
+    elif args.bench == "mining":
+        bench_mining(args.difficulty, args.rounds, args.workers)
+    elif args.bench == "network":
+        bench_network(tuple(args.nodes), args.duration, args.difficulty, args.tx_rate, args.seed)
+    elif args.bench == "serialization":
+        bench_serialization(args.transactions, args.repeat)
+    else:
+        report = run_suite(args.users, args.transactions, tuple(args.difficulties),
+                           tuple(args.chain_lengths), seed=args.seed)
+        if args.json == "-":
+            json.dump(report, sys.stdout, indent=2)
+            print()
+        else:
+            print_report(report)
+            if args.json:
+                with open(args.json, "w") as f:
+                    json.dump(report, f, indent=2)
@@ -1,6 +1,43 @@
 if __name__ == "__main__":
+    import argparse
+    import sys
     import util.cli as cli
     from util.blockchain import Blockchain
+    from util.keyring import keyring
+    from util.keystore import Keystore
+    from util.metrics import metrics
+    from util.storage import ChainStore
 
-    blockchain = Blockchain()
-    cli.cli(blockchain)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Blockchain CLI")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes used for mining, 0 means one per core")
+    parser.add_argument("--data", default=None,
+                        help="directory to keep the chain in between sessions")
+    parser.add_argument("--headers-only", action="store_true",
+                        help="with --data, keep only block headers in memory")
+    parser.add_argument("--script", default=None,
+                        help="run commands from this file ('-' for stdin) instead of the prompt")
+    parser.add_argument("--quiet", action="store_true",
+                        help="with --script, only print errors and a summary")
+    parser.add_argument("--metrics", action="store_true",
+                        help="collect profiling counters and timers (see the stats command)")
+    parser.add_argument("--keystore", default=None,
+                        help="keystore file with more users (see util/keystore.py)")
+    args = parser.parse_args()
+
+    if args.metrics:
+        metrics.enabled = True
+    if args.keystore:
+        keyring.use_keystore(Keystore(args.keystore))
+
+    store = ChainStore(args.data) if args.data else None
+    blockchain = Blockchain(mining_workers=args.workers or None, store=store,
+                            headers_only=args.headers_only)
+    try:
+        if args.script:
+            ok = cli.run_file(blockchain, args.script, quiet=args.quiet)
+            sys.exit(0 if ok else 1)
+        cli.cli(blockchain)
+    finally:
+        if store is not None:
+            store.close()
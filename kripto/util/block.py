@@ -1,9 +1,79 @@
 import hashlib
+import math
 import time
 import json
-from .utils import generate_merkle_root
+from .metrics import metrics, timed
+from .transaction import Transaction
+from .utils import MerkleTree, generate_merkle_root
+
+
+def hash_header(number, prev_hash, merkle_root, timestamp, nonce):
+    block_dict = {
+        "number": number,
+        "prev_hash": prev_hash,
+        "merkle_root": merkle_root,
+        "timestamp": timestamp,
+        "nonce": nonce,
+    }
+    block_string = json.dumps(block_dict, sort_keys=True)
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+
+def header_midstate(number, prev_hash, merkle_root, timestamp):
+    # sort_keys puts "nonce" between "merkle_root" and "number", so the encoded
+    # header is a fixed prefix and suffix around the nonce digits. The prefix is
+    # hashed once and the sha256 state copied for every attempt.
+    block_string = json.dumps({
+        "number": number,
+        "prev_hash": prev_hash,
+        "merkle_root": merkle_root,
+        "timestamp": timestamp,
+        "nonce": 0,
+    }, sort_keys=True)
+    head, tail = block_string.split('"nonce": 0', 1)
+    midstate = hashlib.sha256((head + '"nonce": ').encode())
+    return midstate, tail.encode()
+
+
+MAX_TARGET = 1 << 256
+
+
+def difficulty_to_target(difficulty):
+    # difficulty counts leading hex zeros and may be fractional,
+    # a hash is valid when it is below the target
+    if isinstance(difficulty, int):
+        return 1 << (256 - 4 * difficulty)
+    return max(1, int(MAX_TARGET / 16 ** difficulty))
+
+
+def target_to_difficulty(target):
+    return (256 - math.log2(target)) / 4
+
+
+def search_nonces(midstate, suffix, start, stop, target):
+    for nonce in range(start, stop):
+        h = midstate.copy()
+        h.update(b"%d" % nonce)
+        h.update(suffix)
+        digest = h.digest()
+        if int.from_bytes(digest, "big") < target:
+            return nonce, digest.hex()
+    return None
+
+
+def block_work(target):
+    # expected number of hashes to find a block, used to compare forks
+    return MAX_TARGET // target
+
+
+HEADER_FIELDS = ("number", "prev_hash", "merkle_root", "timestamp", "nonce")
+
 
 class Block:
+    # header-only blocks have no transaction list, only a loader for it
+    _transactions = None
+    _loader = None
+
     def __init__(self, number, prev_hash, transactions):
         self.number = number
         self.prev_hash = prev_hash
@@ -12,28 +82,102 @@ class Block:
         self.nonce = 0
         self.transactions = transactions
 
-    def calculate_hash(self):
-        block_dict = {
+    @property
+    def transactions(self):
+        if self._transactions is not None or self._loader is None:
+            return self._transactions
+        # fetched on every access and not kept, so long chains stay small in memory
+        transactions = self._loader()
+        if generate_merkle_root(transactions) != self.merkle_root:
+            raise ValueError(f"Transactions of block {self.number} do not match its merkle root")
+        return transactions
+
+    @transactions.setter
+    def transactions(self, transactions):
+        self._transactions = transactions
+
+    @property
+    def header_only(self):
+        return self._transactions is None
+
+    def drop_transactions(self, loader):
+        # keep only the header, loader() returns the transactions when needed
+        self._loader = loader
+        self._transactions = None
+
+    def merkle_proof(self, index):
+        # lets a light client check one transaction against merkle_root
+        return MerkleTree(self.transactions).proof(index)
+
+    def to_dict(self):
+        return {
             "number": self.number,
             "prev_hash": self.prev_hash,
             "merkle_root": self.merkle_root,
             "timestamp": self.timestamp,
             "nonce": self.nonce,
+            "transactions": [tx.to_dict() for tx in self.transactions],
         }
-        block_string = json.dumps(block_dict, sort_keys=True)
-        return hashlib.sha256(block_string.encode()).hexdigest()
 
-    def validate(self, difficulty=5):
-        prefix = '0' * difficulty
-        return self.calculate_hash().startswith(prefix)
+    @classmethod
+    def from_dict(cls, data):
+        # restores a stored block as-is, without recomputing the merkle root
+        block = cls.__new__(cls)
+        for name in HEADER_FIELDS:
+            setattr(block, name, data[name])
+        block.transactions = [Transaction.from_dict(tx) for tx in data["transactions"]]
+        return block
+
+    def __setattr__(self, name, value):
+        # any header change invalidates the memoized hash
+        if name in HEADER_FIELDS:
+            self.__dict__["_hash"] = None
+        object.__setattr__(self, name, value)
+
+    def calculate_hash(self):
+        if self._hash is None:
+            if metrics.enabled:
+                start = time.perf_counter()
+                self._hash = hash_header(self.number, self.prev_hash, self.merkle_root, self.timestamp, self.nonce)
+                metrics.record_time("block.hash", time.perf_counter() - start)
+            else:
+                self._hash = hash_header(self.number, self.prev_hash, self.merkle_root, self.timestamp, self.nonce)
+        elif metrics.enabled:
+            metrics.incr("block.hash.cached")
+        return self._hash
+
+    def validate(self, difficulty=5, target=None):
+        if target is None:
+            target = difficulty_to_target(difficulty)
+        return int(self.calculate_hash(), 16) < target
+
+    def header_midstate(self):
+        return header_midstate(self.number, self.prev_hash, self.merkle_root, self.timestamp)
+
+    @timed("block.mine")
+    def mine(self, difficulty=5, workers=1, target=None):
+        if target is None:
+            target = difficulty_to_target(difficulty)
+        if metrics.enabled:
+            metrics.incr("block.mine.attempts", -self.nonce)
+        if workers != 1:
+            from .mining import mine_parallel
+            hash_result, _ = mine_parallel(self, target, workers)
+            self._hash = hash_result
+            metrics.incr("block.mine.attempts", self.nonce + 1)
+            return hash_result
 
-    def mine(self, difficulty=5):
-        prefix = '0' * difficulty
+        midstate, suffix = self.header_midstate()
+        start = self.nonce
+        step = 1 << 16
         while True:
-            hash_result = self.calculate_hash()
-            if hash_result.startswith(prefix):
+            result = search_nonces(midstate, suffix, start, start + step, target)
+            if result is not None:
+                self.nonce, hash_result = result
+                self._hash = hash_result
+                metrics.incr("block.mine.attempts", self.nonce + 1)
                 return hash_result
-            self.nonce += 1
+            start += step
 
     def show_block(self, only_Header=False):
         print("=" * 50)
@@ -1,20 +1,185 @@
+import copy
 import hashlib
 import json
-from time import time
-from .block import Block
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from .block import MAX_TARGET, Block, difficulty_to_target, target_to_difficulty
+from .index import ChainIndex
+from .mempool import Mempool
+from .metrics import metrics, timed
+from .state import AccountState, parse_amount
 from .transaction import Transaction
+from .utils import generate_merkle_root
 
 
 class Blockchain:
-    def __init__(self):
+    def __init__(self, mining_workers=1, store=None, initial_balance=100, genesis=None,
+                 headers_only=False, difficulty=5, retarget_interval=10, target_block_time=10.0):
         self.chain = []
-        self.difficulty = 5
-        self.pending_transactions = []
-        self.create_genesis_block()
+        # proof of work target of the next block, see the difficulty property.
+        # The targets of stored blocks are replayed from these settings, so a
+        # store has to be reopened with the ones it was mined with.
+        self.target = difficulty_to_target(difficulty)
+        # every retarget_interval blocks the target is scaled so blocks come
+        # target_block_time seconds apart, None keeps it fixed
+        self.retarget_interval = retarget_interval
+        self.target_block_time = target_block_time
+        self.targets = []    # target every block of the chain was mined against
+        self.telemetry = []  # one entry per block mined by this instance
+        # number of processes used by mine_block, None means one per core
+        self.mining_workers = mining_workers
+        self.mempool = Mempool()
+        # upper bound on the transactions taken from the mempool per block
+        self.max_block_transactions = 1000
+        # every block up to this height already passed validate_chain
+        self.validated_height = 0
+        self.state = AccountState(initial_balance)
+        self.index = ChainIndex()
+        # False silences progress messages (batch runs), errors are still printed
+        self.verbose = True
+        # optional ChainStore, every appended block is also written to disk
+        self.store = store
+        # with a store, keep only block headers in memory and read
+        # transactions from disk when they are needed
+        self.headers_only = headers_only and store is not None
+        if store is not None and len(store) > 0:
+            # every block is decoded once, state and index are rebuilt from it
+            # before its transactions are dropped
+            for block in store:
+                self._track_block(block)
+                if self.headers_only:
+                    self._drop_transactions(block)
+        else:
+            # chains that exchange blocks must start from the same genesis
+            self.create_genesis_block(genesis)
+
+    def create_genesis_block(self, genesis_block=None):
+        if genesis_block is None:
+            genesis_block = Block(0, "0", [])
+        self.append_block(genesis_block)
+
+    @property
+    def difficulty(self):
+        # leading hex zeros, fractional once the target has been retargeted
+        return target_to_difficulty(self.target)
+
+    @difficulty.setter
+    def difficulty(self, value):
+        self.target = difficulty_to_target(value)
+
+    def _next_target(self):
+        height = len(self.chain)
+        interval = self.retarget_interval
+        if not interval or height < interval or height % interval:
+            return self.target
+        first = self.chain[height - interval]
+        last = self.chain[height - 1]
+        expected = (interval - 1) * self.target_block_time
+        # at most a 4x change per retarget so one odd window cannot swing it
+        actual = min(max(last.timestamp - first.timestamp, expected / 4), expected * 4)
+        return min(MAX_TARGET - 1, max(1, int(self.target * actual / expected)))
+
+    @staticmethod
+    def _loaded(block):
+        # a header-only block reads its transactions from disk on every access,
+        # give the indexes a copy that holds them so they are read once
+        if not block.header_only:
+            return block
+        loaded = copy.copy(block)
+        loaded.transactions = block.transactions
+        return loaded
+
+    def _track_block(self, block):
+        self.chain.append(block)
+        self.targets.append(self.target)
+        self.target = self._next_target()
+        loaded = self._loaded(block)
+        self.state.apply_block(loaded)
+        self.index.add_block(loaded)
+
+    def _drop_transactions(self, block):
+        height = block.number
+        block.drop_transactions(lambda: self.store.get(height).transactions)
+
+    def append_block(self, block):
+        self._track_block(block)
+        # transactions mined elsewhere are no longer pending here; done before
+        # the transactions are dropped, so they are not read back from disk
+        for tx in block.transactions:
+            self.mempool.remove(tx.calculate_hash())
+        if self.store is not None:
+            self.store.append(block)
+            if self.headers_only:
+                self._drop_transactions(block)
+
+    def check_block(self, block):
+        # validates a block received from elsewhere against the current tip,
+        # returns None if it can be appended or the reason it cannot
+        last_block = self.get_last_block()
+        if block.number != last_block.number + 1 or block.prev_hash != last_block.calculate_hash():
+            return "does not extend the chain"
+        if not block.validate(target=self.target):
+            return "failed proof of work"
+        if generate_merkle_root(block.transactions) != block.merkle_root:
+            return "merkle root mismatch"
+        balances = {}
+        for tx in block.transactions:
+            if not tx.verify_signature(verbose=False):
+                return "invalid transaction signature"
+            try:
+                amount = parse_amount(tx.amount)
+            except ValueError:
+                return "invalid amount"
+            available = balances.get(tx.sender, self.state.balance(tx.sender))
+            if amount <= 0 or available < amount:
+                return "insufficient funds"
+            balances[tx.sender] = available - amount
+            balances[tx.receiver] = balances.get(tx.receiver, self.state.balance(tx.receiver)) + amount
+        return None
+
+    def accept_block(self, block):
+        reason = self.check_block(block)
+        if reason is None:
+            self.append_block(block)
+        return reason
+
+    def pop_block(self):
+        # removes the last block and puts its transactions back in the mempool
+        if len(self.chain) <= 1:
+            raise IndexError("cannot remove the genesis block")
+        block = self._loaded(self.chain.pop())
+        self.target = self.targets.pop()
+        self.state.revert_block(block)
+        self.index.remove_block(block)
+        if self.store is not None:
+            self.store.truncate(len(self.chain))
+        self.validated_height = min(self.validated_height, len(self.chain) - 1)
+        for tx in block.transactions:
+            self.mempool.add(tx)
+        return block
+
+    def balance(self, account):
+        return self.state.balance(account)
+
+    def get_block(self, height):
+        return self.store.get(height) if self.store is not None else self.chain[height]
+
+    def get_transaction(self, tx_hash):
+        location = self.index.find_transaction(tx_hash)
+        if location is None:
+            return None
+        height, position = location
+        return self.chain[height].transactions[position]
+
+    def log(self, message):
+        if self.verbose:
+            print(message)
 
-    def create_genesis_block(self):
-        genesis_block = Block(0, "0", [])
-        self.chain.append(genesis_block)
+    @property
+    def pending_transactions(self):
+        return list(self.mempool)
 
     def get_last_block(self):
         return self.chain[-1]
@@ -22,24 +187,117 @@ class Blockchain:
     def add_transaction(self, sender, receiver, amount):
         transaction = Transaction(sender, receiver, amount)
         if transaction.verify_signature():
-            self.pending_transactions.append(transaction)
-        else:
-            print("Invalid transaction signature.\n")
+            accepted, reason = self._admit(transaction)
+            if not accepted:
+                print(f"Transaction rejected: {reason}.\n")
+            return accepted
+        print("Invalid transaction signature.\n")
+        return False
+
+    @timed("chain.add_transactions")
+    def add_transactions(self, items, workers=None):
+        # items: iterable of (sender, receiver, amount)
+        # returns one (accepted, reason) pair per item, in input order
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            outcomes = list(pool.map(self._sign_and_verify, items))
+
+        results = []
+        for transaction, reason in outcomes:
+            if transaction is not None:
+                results.append(self._admit(transaction))
+            else:
+                results.append((False, reason))
+        return results
+
+    def _admit(self, transaction):
+        accepted, reason = self._check_funds(transaction)
+        if accepted:
+            accepted, reason = self.mempool.add(transaction)
+        metrics.incr("mempool.accepted" if accepted else f"mempool.rejected.{reason}")
+        return accepted, reason
+
+    def _check_funds(self, transaction):
+        # the sender must cover this amount on top of everything already pending
+        try:
+            amount = parse_amount(transaction.amount)
+        except ValueError:
+            return False, "invalid amount"
+        if amount <= 0:
+            return False, "invalid amount"
+        pending = self.mempool.pending_spend(transaction.sender)
+        if self.state.balance(transaction.sender) - pending < amount:
+            return False, "insufficient funds"
+        return True, None
+
+    def submit_transaction(self, transaction):
+        # for transactions signed elsewhere (e.g. relayed by a peer)
+        if not transaction.verify_signature(verbose=False):
+            return False, "invalid signature"
+        if self.index.find_transaction(transaction.calculate_hash()) is not None:
+            return False, "already mined"
+        return self._admit(transaction)
+
+    @staticmethod
+    def _sign_and_verify(item):
+        # runs on a worker thread, the cryptography backend releases the GIL
+        # while signing and verifying
+        sender, receiver, amount = item
+        try:
+            transaction = Transaction(sender, receiver, amount)
+        except FileNotFoundError:
+            return None, "unknown sender"
+        if not transaction.verify_signature(verbose=False):
+            return None, "invalid signature"
+        return transaction, None
+
+    def add_transactions_from_file(self, filename, workers=None):
+        items = []
+        with open(filename, 'r') as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) == 3 and not parts[0].startswith('#'):
+                    items.append(tuple(parts))
+        results = self.add_transactions(items, workers)
+        accepted = sum(1 for ok, _ in results if ok)
+        self.log(f"{accepted} transactions accepted, {len(results) - accepted} rejected.")
+        for reason, count in Counter(r for ok, r in results if not ok).items():
+            self.log(f"  {reason}: {count}")
+        return results
 
+    @timed("chain.mine_block")
     def mine_block(self):
-        if not self.pending_transactions:
-            print("No transactions to mine.\n")
+        if not len(self.mempool):
+            self.log("No transactions to mine.\n")
             return
 
+        transactions = self.mempool.pop_batch(self.max_block_transactions)
         last_block = self.get_last_block()
-        new_block = Block(last_block.number + 1, last_block.calculate_hash(), self.pending_transactions)
-        mined_hash = new_block.mine(self.difficulty)
-        self.chain.append(new_block)
-        self.pending_transactions = []
-        print(f"Block {new_block.number} mined with hash: {mined_hash}\n")
-
-    def validate_chain(self):
-        for i in range(1, len(self.chain)):
+        new_block = Block(last_block.number + 1, last_block.calculate_hash(), transactions)
+        difficulty = self.difficulty
+        start = time.perf_counter()
+        mined_hash = new_block.mine(workers=self.mining_workers, target=self.target)
+        elapsed = time.perf_counter() - start
+        attempts = new_block.nonce + 1
+        self.append_block(new_block)
+        metrics.observe("block.transactions", len(transactions))
+        self.telemetry.append({
+            "height": new_block.number,
+            "difficulty": difficulty,
+            "attempts": attempts,
+            "seconds": elapsed,
+            "hashrate": attempts / elapsed if elapsed > 0 else None,
+            "interval": new_block.timestamp - last_block.timestamp,
+        })
+        self.log(f"Block {new_block.number} mined with hash: {mined_hash}\n")
+
+    @timed("chain.validate")
+    def validate_chain(self, full=False):
+        # only blocks appended since the last successful run are checked,
+        # full=True rechecks the whole chain (e.g. for audits)
+        if full:
+            self.validated_height = 0
+        start = min(self.validated_height, len(self.chain) - 1) + 1
+        for i in range(start, len(self.chain)):
             current = self.chain[i]
             previous = self.chain[i - 1]
 
@@ -47,16 +305,18 @@ class Blockchain:
                 print(f"Block {current.number} has invalid previous hash.")
                 return False
 
-            if not current.validate(self.difficulty):
+            if not current.validate(target=self.targets[i]):
                 print(f"Block {current.number} failed proof of work.")
                 return False
 
-        print("Blockchain is valid.\n")
+            self.validated_height = i
+
+        self.log("Blockchain is valid.\n")
         return True
     
     def show_block(self, index):
         if 0 <= index < len(self.chain):
-            self.chain[index].show_block(only_Header=False)
+            self.get_block(index).show_block(only_Header=False)
         else:
             print("Block index out of range.\n")
 
@@ -65,9 +325,42 @@ class Blockchain:
             block.show_block(only_Header=True)
             print("---------------")
 
+    def show_transaction(self, tx_hash):
+        location = self.index.find_transaction(tx_hash)
+        if location is None:
+            print("Transaction not found.\n")
+            return
+        print(f"In block {location[0]} at position {location[1]}")
+        self.get_transaction(tx_hash).show_transaction()
+
+    def show_history(self, account):
+        history = self.index.history(account)
+        if not history:
+            print(f"No transactions for {account}.\n")
+            return
+        # a header-only block reads its transactions from disk on every access,
+        # so they are fetched once per block rather than once per entry
+        for height, entries in groupby(history, key=lambda entry: entry[0]):
+            transactions = self.chain[height].transactions
+            for _, position in entries:
+                tx = transactions[position]
+                print(f"  Block {height:<6} {tx.sender} -> {tx.receiver}: {tx.amount}  ({tx.calculate_hash()})")
+
+    def show_telemetry(self, count=10):
+        print(f"Current difficulty: {self.difficulty:.3f} "
+              f"(retarget every {self.retarget_interval} blocks, aim {self.target_block_time}s/block)")
+        if not self.telemetry:
+            print("No blocks mined in this session.\n")
+            return
+        for entry in self.telemetry[-count:]:
+            hashrate = entry["hashrate"] or 0
+            print(f"  Block {entry['height']:<6} difficulty {entry['difficulty']:6.3f}  "
+                  f"{entry['attempts']:>10,} attempts  {entry['seconds']:8.3f}s  "
+                  f"{hashrate:>12,.0f} H/s  interval {entry['interval']:8.3f}s")
+
     def show_pending(self):
-        if not self.pending_transactions:
+        if not len(self.mempool):
             print("No pending transactions.\n")
             return
-        for tx in self.pending_transactions:
+        for tx in self.mempool:
             tx.show_transaction()
\ No newline at end of file
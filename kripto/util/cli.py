@@ -1,21 +1,171 @@
+import sys
+import time
+from collections import Counter
+from .metrics import metrics
+
+
 def print_help():
 	print("""
 Users: alice, bob, cecil, dave
 
 Commands:
   add-transaction <sender> <receiver> <amount> 			   Add a new transaction
+  add-transactions <filename>                              Add "<sender> <receiver> <amount>" lines in bulk
   show-pending                                             Show pending transactions
   mine-block                                               Mine a new block
   show-chain                                               Show the blockchain
   show-block <index>                                       Show a specific block
-  validate                                                 Validate the blockchain
+  show-tx <hash>                                           Show a mined transaction by its hash
+  history <user>                                           Show the mined transactions of a user
+  balance <user>                                           Show the confirmed balance of a user
+  telemetry [count]                                        Show difficulty and mining stats of recent blocks
+  validate [--full]                                        Validate new blocks (--full: whole chain)
+  stats [on|off|reset|export <file>]                       Show or control profiling counters and timers
   help                                                     Show this help message
   exit                                                     Exit the CLI
 
-  run-file <filename>                                      For faster simulation purposes
+  run-file <filename> [--quiet]                            For faster simulation purposes ('-' reads stdin)
 	""")
 
 
+# Every command handler returns True on success and False on failure.
+
+def _add_transaction(blockchain, args):
+	sender, receiver, amount = args
+	if not blockchain.add_transaction(sender, receiver, amount):
+		return False
+	blockchain.log("Transaction added.")
+	return True
+
+
+def _add_transactions(blockchain, args):
+	try:
+		blockchain.add_transactions_from_file(args[0])
+	except FileNotFoundError:
+		print(f"File '{args[0]}' not found.")
+		return False
+	return True
+
+
+def _show_pending(blockchain, args):
+	print("Pending Transactions:")
+	print("=" * 50)
+	blockchain.show_pending()
+	return True
+
+
+def _mine_block(blockchain, args):
+	blockchain.mine_block()
+	return True
+
+
+def _show_chain(blockchain, args):
+	print("Blockchain:")
+	print("=" * 50)
+	blockchain.show_chain()
+	return True
+
+
+def _show_block(blockchain, args):
+	try:
+		index = int(args[0])
+	except ValueError:
+		print(f"Invalid block index '{args[0]}'.")
+		return False
+	print(f"Block {index} Details:")
+	print("=" * 50)
+	blockchain.show_block(index)
+	return True
+
+
+def _show_tx(blockchain, args):
+	blockchain.show_transaction(args[0])
+	return True
+
+
+def _history(blockchain, args):
+	print(f"History of {args[0]}:")
+	print("=" * 50)
+	blockchain.show_history(args[0])
+	return True
+
+
+def _balance(blockchain, args):
+	print(f"Balance of {args[0]}: {blockchain.balance(args[0])}")
+	return True
+
+
+def _validate(blockchain, args):
+	return blockchain.validate_chain(full='--full' in args)
+
+
+def _telemetry(blockchain, args):
+	try:
+		count = int(args[0]) if args else 10
+	except ValueError:
+		print(f"Invalid count '{args[0]}'.")
+		return False
+	blockchain.show_telemetry(count)
+	return True
+
+
+def _stats(blockchain, args):
+	if not args:
+		metrics.show()
+	elif args[0] in ('on', 'off') and len(args) == 1:
+		metrics.enabled = args[0] == 'on'
+		blockchain.log(f"Metrics {'enabled' if metrics.enabled else 'disabled'}.")
+	elif args[0] == 'reset' and len(args) == 1:
+		metrics.reset()
+		blockchain.log("Metrics reset.")
+	elif args[0] == 'export' and len(args) == 2:
+		metrics.export(args[1])
+		blockchain.log(f"Metrics written to {args[1]}.")
+	else:
+		print("Usage: stats [on|off|reset|export <file>]")
+		return False
+	return True
+
+
+def _run_file(blockchain, args):
+	return run_file(blockchain, args[0], quiet='--quiet' in args[1:])
+
+
+def _help(blockchain, args):
+	print_help()
+	return True
+
+
+# name -> (handler, allowed argument counts)
+COMMANDS = {
+	'add-transaction': (_add_transaction, (3,)),
+	'add-transactions': (_add_transactions, (1,)),
+	'show-pending': (_show_pending, (0,)),
+	'mine-block': (_mine_block, (0,)),
+	'show-chain': (_show_chain, (0,)),
+	'show-block': (_show_block, (1,)),
+	'show-tx': (_show_tx, (1,)),
+	'history': (_history, (1,)),
+	'balance': (_balance, (1,)),
+	'telemetry': (_telemetry, (0, 1)),
+	'validate': (_validate, (0, 1)),
+	'stats': (_stats, (0, 1, 2)),
+	'run-file': (_run_file, (1, 2)),
+	'help': (_help, (0,)),
+}
+
+
+def execute(blockchain, cmd):
+	"""Run one command line, returns True, False (failed) or None (unknown)."""
+	args = cmd.split()
+	entry = COMMANDS.get(args[0])
+	if entry is None or len(args) - 1 not in entry[1]:
+		print("Unknown command. Type 'help' for a list of commands.")
+		return None
+	handler, _ = entry
+	return handler(blockchain, args[1:])
+
+
 def cli(blockchain):
 	print("Welcome to the Blockchain CLI!")
 	print("=" * 50)
@@ -24,76 +174,54 @@ def cli(blockchain):
 		cmd = input("blockchain> ").strip()
 		if not cmd:
 			continue
-		args = cmd.split()
-		if args[0] == 'add-transaction' and len(args) == 4:
-			sender, receiver, amount = args[1:]
-			blockchain.add_transaction(sender, receiver, amount)
-			print("Transaction added.")
-			print("=" * 50)
-		elif args[0] == 'show-pending':
-			print("Pending Transactions:")
-			print("=" * 50)
-			blockchain.show_pending()
-			print("=" * 50)
-		elif args[0] == 'mine-block':
-			blockchain.mine_block()
-			print("=" * 50)
-		elif args[0] == 'show-chain':
-			print("Blockchain:")
-			print("=" * 50)
-			blockchain.show_chain()
-			print("=" * 50)
-		elif args[0] == 'show-block' and len(args) == 2:
-			index = int(args[1])
-			print(f"Block {index} Details:")
-			print("=" * 50)
-			blockchain.show_block(index)
-			print("=" * 50)
-		elif args[0] == 'validate':
-			blockchain.validate_chain()
-			print("=" * 50)
-		elif args[0] == 'run-file' and len(args) == 2:
-			run_file(blockchain, args[1])
-			print("=" * 50)
-		elif args[0] == 'help':
-			print_help()
-			print("=" * 50)
-		elif args[0] == 'exit':
+		if cmd.split()[0] == 'exit':
 			print("Exiting CLI.")
 			break
-		else:
-			print("Unknown command. Type 'help' for a list of commands.")
-			print("=" * 50)
+		execute(blockchain, cmd)
+		print("=" * 50)
+
 
-def run_file(blockchain, filename):
+def run_stream(blockchain, lines, quiet=False):
+	# lines are consumed one at a time, so arbitrarily long (or piped) scripts
+	# never have to fit in memory. quiet only prints errors and a final summary.
+	verbose = blockchain.verbose
+	blockchain.verbose = not quiet
+	counts = Counter()
+	failed = 0
+	start = time.perf_counter()
 	try:
-		with open(filename, 'r') as f:
-			commands = f.readlines()
+		for line in lines:
+			cmd = line.strip()
+			if not cmd or cmd.startswith('#'):
+				continue
+			if cmd.split()[0] == 'exit':
+				break
+			if not quiet:
+				print(f"Executing: {cmd}")
+			result = execute(blockchain, cmd)
+			counts[cmd.split()[0] if result is not None else 'unknown'] += 1
+			if not result:
+				failed += 1
+	finally:
+		blockchain.verbose = verbose
+
+	elapsed = time.perf_counter() - start
+	if quiet:
+		total = sum(counts.values())
+		print(f"Ran {total} commands in {elapsed:.2f}s, {failed} failed.")
+		for name, count in sorted(counts.items()):
+			print(f"  {name}: {count}")
+		print(f"Chain height: {len(blockchain.chain) - 1}, pending transactions: {len(blockchain.mempool)}")
+	return failed == 0
+
+
+def run_file(blockchain, filename, quiet=False):
+	if filename == '-':
+		return run_stream(blockchain, sys.stdin, quiet)
+	try:
+		f = open(filename, 'r')
 	except FileNotFoundError:
 		print(f"File '{filename}' not found.")
-		return
-
-	for line in commands:
-		cmd = line.strip()
-		if not cmd or cmd.startswith('#'):
-			continue
-		print(f"Executing: {cmd}")
-		args = cmd.split()
-		if args[0] == 'add-transaction' and len(args) == 4:
-			sender, receiver, amount = args[1:]
-			blockchain.add_transaction(sender, receiver, amount)
-			print("Transaction added.")
-		elif args[0] == 'show-pending':
-			blockchain.show_pending()
-		elif args[0] == 'mine-block':
-			blockchain.mine_block()
-		elif args[0] == 'show-chain':
-			blockchain.show_chain()
-		elif args[0] == 'show-block' and len(args) == 2:
-			blockchain.show_block(int(args[1]))
-		elif args[0] == 'validate':
-			blockchain.validate_chain()
-		elif args[0] == 'help':
-			print_help()
-		else:
-			print(f"Unknown command in file: {cmd}\n")
+		return False
+	with f:
+		return run_stream(blockchain, f, quiet)
@@ -0,0 +1,170 @@
+import struct
+from .block import Block
+from .transaction import Transaction
+
+# Compact binary encoding of blocks and transactions, version 2.
+#
+# block:       header | varint tx count | (varint length, transaction) * count
+# header:      version u8, flags u8, number u32, prev_hash 32 bytes,
+#              merkle_root 32 bytes, timestamp f64, nonce u64 (little endian)
+# transaction: sender, receiver (varint length + utf-8), amount (tag u8 + value),
+#              signature (varint length + DER bytes), nonce (varint, nonce + 1
+#              or 0 for none)
+#
+# Version 1 is the same without the transaction nonce and is still decoded.
+
+VERSION = 2
+VERSIONS = (1, 2)
+HEADER = struct.Struct("<BBI32s32sdQ")
+
+FLAG_MERKLE_ROOT = 0x01   # merkle_root is present (blocks without transactions have None)
+FLAG_GENESIS_PREV = 0x02  # prev_hash is the genesis placeholder "0"
+
+AMOUNT_STR = 0
+AMOUNT_INT = 1
+AMOUNT_FLOAT = 2
+FLOAT = struct.Struct("<d")
+
+NO_HASH = bytes(32)
+
+
+def write_varint(out, value):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def read_varint(buf, offset):
+    value = 0
+    shift = 0
+    while True:
+        byte = buf[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+def _write_bytes(out, data):
+    write_varint(out, len(data))
+    out += data
+
+
+def _read_bytes(buf, offset):
+    length = buf[offset]
+    if length < 0x80:
+        offset += 1
+    else:
+        length, offset = read_varint(buf, offset)
+    return buf[offset:offset + length], offset + length
+
+
+def encode_transaction(tx, out=None):
+    out = bytearray() if out is None else out
+    _write_bytes(out, tx.sender.encode())
+    _write_bytes(out, tx.receiver.encode())
+    # the amount keeps its python type, it is part of the transaction hash
+    amount = tx.amount
+    if isinstance(amount, str):
+        out.append(AMOUNT_STR)
+        _write_bytes(out, amount.encode())
+    elif isinstance(amount, int):
+        out.append(AMOUNT_INT)
+        write_varint(out, amount * 2 if amount >= 0 else -amount * 2 - 1)  # zigzag
+    elif isinstance(amount, float):
+        out.append(AMOUNT_FLOAT)
+        out += FLOAT.pack(amount)
+    else:
+        raise TypeError(f"Cannot encode amount of type {type(amount).__name__}")
+    _write_bytes(out, tx.signature)
+    write_varint(out, 0 if tx.nonce is None else tx.nonce + 1)
+    return out
+
+
+def decode_transaction(buf, offset=0, version=VERSION):
+    if not isinstance(buf, bytes):
+        buf = bytes(buf)
+    tx = Transaction.__new__(Transaction)
+    sender, offset = _read_bytes(buf, offset)
+    receiver, offset = _read_bytes(buf, offset)
+    tag = buf[offset]
+    offset += 1
+    if tag == AMOUNT_STR:
+        amount, offset = _read_bytes(buf, offset)
+        amount = amount.decode()
+    elif tag == AMOUNT_INT:
+        zigzag, offset = read_varint(buf, offset)
+        amount = (zigzag >> 1) ^ -(zigzag & 1)
+    elif tag == AMOUNT_FLOAT:
+        (amount,) = FLOAT.unpack_from(buf, offset)
+        offset += FLOAT.size
+    else:
+        raise ValueError(f"Unknown amount tag {tag}")
+    tx.sender = sender.decode()
+    tx.receiver = receiver.decode()
+    tx.amount = amount
+    tx.signature, offset = _read_bytes(buf, offset)
+    if version >= 2:
+        nonce, offset = read_varint(buf, offset)
+        tx.nonce = nonce - 1 if nonce else None
+    return tx, offset
+
+
+def _hash_to_bytes(value):
+    if len(value) != 64:
+        raise ValueError(f"Expected a 64 character hex hash, got {value!r}")
+    return bytes.fromhex(value)
+
+
+def encode_block(block):
+    flags = 0
+    if block.merkle_root is not None:
+        flags |= FLAG_MERKLE_ROOT
+        merkle_root = _hash_to_bytes(block.merkle_root)
+    else:
+        merkle_root = NO_HASH
+    if block.prev_hash == "0":
+        flags |= FLAG_GENESIS_PREV
+        prev_hash = NO_HASH
+    else:
+        prev_hash = _hash_to_bytes(block.prev_hash)
+
+    out = bytearray(HEADER.pack(VERSION, flags, block.number, prev_hash,
+                                merkle_root, block.timestamp, block.nonce))
+    write_varint(out, len(block.transactions))
+    for tx in block.transactions:
+        _write_bytes(out, encode_transaction(tx))
+    return bytes(out)
+
+
+def decode_header(buf):
+    """Decode only the fixed-width header, the block has no transactions."""
+    version, flags, number, prev_hash, merkle_root, timestamp, nonce = HEADER.unpack_from(buf, 0)
+    if version not in VERSIONS:
+        raise ValueError(f"Unsupported block encoding version {version}")
+
+    block = Block.__new__(Block)
+    block.number = number
+    block.prev_hash = "0" if flags & FLAG_GENESIS_PREV else prev_hash.hex()
+    block.merkle_root = merkle_root.hex() if flags & FLAG_MERKLE_ROOT else None
+    block.timestamp = timestamp
+    block.nonce = nonce
+    return block
+
+
+def decode_block(buf):
+    if not isinstance(buf, bytes):
+        buf = bytes(buf)
+    block = decode_header(buf)
+    version = buf[0]
+
+    count, offset = read_varint(buf, HEADER.size)
+    transactions = []
+    for _ in range(count):
+        _, offset = read_varint(buf, offset)
+        tx, offset = decode_transaction(buf, offset, version)
+        transactions.append(tx)
+    block.transactions = transactions
+    return block
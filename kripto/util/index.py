@@ -0,0 +1,45 @@
+class ChainIndex:
+    """Lookup tables over the chain, updated as blocks are appended or removed.
+
+    tx hash -> (height, position), block hash -> height and
+    address -> [(height, position), ...] in chain order.
+    """
+
+    def __init__(self):
+        self.tx_locations = {}
+        self.block_heights = {}
+        self.address_history = {}
+
+    def add_block(self, block):
+        height = block.number
+        self.block_heights[block.calculate_hash()] = height
+        for position, tx in enumerate(block.transactions):
+            location = (height, position)
+            self.tx_locations[tx.calculate_hash()] = location
+            self.address_history.setdefault(tx.sender, []).append(location)
+            if tx.receiver != tx.sender:
+                self.address_history.setdefault(tx.receiver, []).append(location)
+
+    def remove_block(self, block):
+        # only ever called for the last block, so its entries sit at the end
+        height = block.number
+        self.block_heights.pop(block.calculate_hash(), None)
+        for position, tx in enumerate(block.transactions):
+            tx_hash = tx.calculate_hash()
+            if self.tx_locations.get(tx_hash) == (height, position):
+                del self.tx_locations[tx_hash]
+            for address in {tx.sender, tx.receiver}:
+                history = self.address_history.get(address)
+                while history and history[-1][0] == height:
+                    history.pop()
+                if history == []:
+                    del self.address_history[address]
+
+    def find_transaction(self, tx_hash):
+        return self.tx_locations.get(tx_hash)
+
+    def find_block(self, block_hash):
+        return self.block_heights.get(block_hash)
+
+    def history(self, address):
+        return self.address_history.get(address, [])
@@ -0,0 +1,83 @@
+import os
+import threading
+from collections import OrderedDict
+from cryptography.hazmat.primitives import serialization
+from .metrics import metrics, timed
+
+KEYS_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "keys"))
+
+
+class KeyRing:
+    """Process-wide cache of parsed PEM keys.
+
+    Keys are loaded lazily on first use, the least recently used ones are
+    dropped above max_size, and a key is reloaded when its file's mtime changes.
+    Users found in the optional keystore are served from it, everyone else
+    from the PEM files in keys_dir.
+    """
+
+    def __init__(self, keys_dir=KEYS_DIR, max_size=1024, keystore=None):
+        self.keys_dir = keys_dir
+        self.max_size = max_size
+        self.keystore = keystore
+        self._keys = OrderedDict()  # (user, kind) -> ((path, mtime), key)
+        self._lock = threading.Lock()
+
+    def private_key(self, user):
+        return self._get(user, "private")
+
+    def public_key(self, user):
+        return self._get(user, "public")
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def use_keystore(self, keystore):
+        self.keystore = keystore
+        self.clear()
+
+    def _get(self, user, kind):
+        keystore = self.keystore
+        if keystore is not None and user in keystore:
+            path = None
+            version = (keystore.path, os.stat(keystore.path).st_mtime_ns)
+        else:
+            path = os.path.join(self.keys_dir, f"{user}_{kind}.pem")
+            version = (path, os.stat(path).st_mtime_ns)
+        cache_key = (user, kind)
+        with self._lock:
+            entry = self._keys.get(cache_key)
+            if entry is not None and entry[0] == version:
+                self._keys.move_to_end(cache_key)
+                metrics.incr("keyring.hit")
+                return entry[1]
+
+        key = self._load(user, kind, keystore if path is None else None, path, version)
+
+        with self._lock:
+            self._keys[cache_key] = (version, key)
+            self._keys.move_to_end(cache_key)
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+        return key
+
+
+    @timed("keyring.load")
+    def _load(self, user, kind, keystore, path, version):
+        if keystore is not None:
+            # the keystore is shared with other threads, reopen it under the lock
+            with self._lock:
+                if keystore.mtime != version[1]:
+                    keystore.reload()
+                if kind == "private":
+                    return keystore.private_key(user)
+                return keystore.public_key(user)
+        with open(path, "rb") as f:
+            data = f.read()
+        if kind == "private":
+            return serialization.load_pem_private_key(data, password=None)
+        return serialization.load_pem_public_key(data)
+
+
+keyring = KeyRing()
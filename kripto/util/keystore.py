@@ -0,0 +1,150 @@
+import mmap
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives import serialization
+
+# Single-file keystore, version 1 (little endian):
+#
+# header:  magic b"KSTR", version u32, user count u32, index offset u64
+# records: private key length u16 + DER (PKCS8), public key length u16 + DER (SPKI)
+# index:   per user: name length u16 + utf-8 name, record offset u64
+
+MAGIC = b"KSTR"
+VERSION = 1
+HEADER = struct.Struct("<4sIIQ")
+LENGTH = struct.Struct("<H")
+OFFSET = struct.Struct("<Q")
+
+
+def _generate(count):
+    # runs in a worker process
+    pairs = []
+    for _ in range(count):
+        private_key = ec.generate_private_key(ec.SECP256K1())
+        private_der = private_key.private_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        public_der = private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.DER,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        pairs.append((private_der, public_der))
+    return pairs
+
+
+class Keystore:
+    """Key pairs of many users in one indexed file.
+
+    The index is read into a dict on open and records are read through mmap,
+    so looking up a user's key costs one dict lookup and one slice.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._map = None
+        self._offsets = {}
+        self.reload()
+
+    def reload(self):
+        self.close()
+        self._file = open(self.path, "rb")
+        self.mtime = os.fstat(self._file.fileno()).st_mtime_ns
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, index_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} keystore")
+        offsets = {}
+        offset = index_offset
+        for _ in range(count):
+            (length,) = LENGTH.unpack_from(self._map, offset)
+            offset += LENGTH.size
+            user = self._map[offset:offset + length].decode()
+            offset += length
+            (offsets[user],) = OFFSET.unpack_from(self._map, offset)
+            offset += OFFSET.size
+        self._offsets = offsets
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+        self._map = None
+        self._file = None
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def __contains__(self, user):
+        return user in self._offsets
+
+    def users(self):
+        return list(self._offsets)
+
+    def key_bytes(self, user):
+        """Return (private DER, public DER) of user."""
+        offset = self._offsets[user]
+        (length,) = LENGTH.unpack_from(self._map, offset)
+        offset += LENGTH.size
+        private_der = self._map[offset:offset + length]
+        offset += length
+        (length,) = LENGTH.unpack_from(self._map, offset)
+        offset += LENGTH.size
+        return private_der, self._map[offset:offset + length]
+
+    def private_key(self, user):
+        return serialization.load_der_private_key(self.key_bytes(user)[0], password=None)
+
+    def public_key(self, user):
+        return serialization.load_der_public_key(self.key_bytes(user)[1])
+
+    @classmethod
+    def create(cls, path, users, workers=None, chunk_size=256):
+        """Generate a key pair per user on a process pool and write the keystore."""
+        users = list(users)
+        if len(set(users)) != len(users):
+            raise ValueError("Duplicate user ids")
+        chunks = [min(chunk_size, len(users) - i) for i in range(0, len(users), chunk_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pairs = [pair for chunk in pool.map(_generate, chunks) for pair in chunk]
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(bytes(HEADER.size))
+            offsets = []
+            for private_der, public_der in pairs:
+                offsets.append(f.tell())
+                f.write(LENGTH.pack(len(private_der)) + private_der)
+                f.write(LENGTH.pack(len(public_der)) + public_der)
+            index_offset = f.tell()
+            for user, offset in zip(users, offsets):
+                name = user.encode()
+                f.write(LENGTH.pack(len(name)) + name + OFFSET.pack(offset))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, len(users), index_offset))
+        try:
+            os.chmod(tmp_path, 0o600)
+        except Exception:
+            pass
+        # replaced in one step, readers never see a half written keystore
+        os.replace(tmp_path, path)
+        return cls(path)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Generate a keystore for many users")
+    parser.add_argument("path")
+    parser.add_argument("--users", type=int, default=1000, help="creates user0 .. user<N-1>")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    keystore = Keystore.create(args.path, [f"user{i}" for i in range(args.users)], args.workers)
+    print(f"Generated {len(keystore)} key pairs in {time.perf_counter() - start:.2f}s: {args.path}")
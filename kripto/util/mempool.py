@@ -0,0 +1,138 @@
+import heapq
+import itertools
+from .codec import encode_transaction
+from .state import parse_amount
+
+
+def amount_priority(transaction, arrival):
+    try:
+        return float(transaction.amount)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _pending_amount(transaction):
+    try:
+        return parse_amount(transaction.amount)
+    except (TypeError, ValueError):
+        return 0
+
+
+def arrival_priority(transaction, arrival):
+    # earlier transactions first
+    return -arrival
+
+
+PRIORITIES = {
+    "amount": amount_priority,
+    "arrival": arrival_priority,
+}
+
+
+class Mempool:
+    """Pending transactions waiting to be mined.
+
+    Transactions are indexed by hash (duplicate detection) and by sender, with
+    a running total of what each sender has pending (overdraft checks), and
+    ordered by priority with two lazily cleaned heaps: a max-heap to pick the
+    next block's transactions and a min-heap to evict the least valuable one
+    when max_count or max_bytes is exceeded.
+    """
+
+    def __init__(self, max_count=100_000, max_bytes=64 * 1024 * 1024, priority="arrival"):
+        self.max_count = max_count
+        self.max_bytes = max_bytes
+        self.priority = PRIORITIES[priority]
+        self.size_bytes = 0
+        self._by_hash = {}    # tx hash -> (transaction, priority, size, arrival)
+        self._by_sender = {}  # sender -> {tx hash: transaction}
+        self._spend = {}      # sender -> total amount of its pending transactions
+        self._best = []       # (-priority, arrival, tx hash)
+        self._worst = []      # (priority, -arrival, tx hash)
+        self._arrival = itertools.count()
+
+    def __len__(self):
+        return len(self._by_hash)
+
+    def __contains__(self, tx_hash):
+        return tx_hash in self._by_hash
+
+    def __iter__(self):
+        # in mining order, without removing anything
+        entries = sorted(self._by_hash.values(), key=lambda entry: (-entry[1], entry[3]))
+        return (entry[0] for entry in entries)
+
+    def add(self, transaction):
+        """Add a transaction, returns (accepted, reason)."""
+        tx_hash = transaction.calculate_hash()
+        if tx_hash in self._by_hash:
+            return False, "duplicate"
+        arrival = next(self._arrival)
+        priority = self.priority(transaction, arrival)
+        size = len(encode_transaction(transaction))
+
+        self._by_hash[tx_hash] = (transaction, priority, size, arrival)
+        self._by_sender.setdefault(transaction.sender, {})[tx_hash] = transaction
+        self._spend[transaction.sender] = self._spend.get(transaction.sender, 0) + _pending_amount(transaction)
+        heapq.heappush(self._best, (-priority, arrival, tx_hash))
+        heapq.heappush(self._worst, (priority, -arrival, tx_hash))
+        self.size_bytes += size
+
+        while len(self._by_hash) > self.max_count or self.size_bytes > self.max_bytes:
+            evicted = self._pop(best=False)
+            if evicted is transaction:
+                return False, "mempool full"
+        return True, None
+
+    def remove(self, tx_hash):
+        entry = self._by_hash.pop(tx_hash, None)
+        if entry is None:
+            return None
+        transaction, _, size, _ = entry
+        self.size_bytes -= size
+        sender_txs = self._by_sender[transaction.sender]
+        del sender_txs[tx_hash]
+        if sender_txs:
+            self._spend[transaction.sender] -= _pending_amount(transaction)
+        else:
+            del self._by_sender[transaction.sender]
+            del self._spend[transaction.sender]
+        return transaction
+
+    def by_sender(self, sender):
+        return list(self._by_sender.get(sender, {}).values())
+
+    def pending_spend(self, sender):
+        """Total amount of the sender's pending transactions."""
+        return self._spend.get(sender, 0)
+
+    def pop_batch(self, limit):
+        """Remove and return up to limit transactions, highest priority first."""
+        batch = []
+        while len(batch) < limit:
+            transaction = self._pop(best=True)
+            if transaction is None:
+                break
+            batch.append(transaction)
+        return batch
+
+    def _compact(self):
+        # drop stale heap entries once they outnumber the live ones
+        live = {entry[3] for entry in self._by_hash.values()}
+        self._best = [item for item in self._best if item[1] in live]
+        self._worst = [item for item in self._worst if -item[1] in live]
+        heapq.heapify(self._best)
+        heapq.heapify(self._worst)
+
+    def _pop(self, best):
+        # heap entries of removed transactions are skipped lazily; the arrival
+        # number tells a live entry apart from a stale one for a re-added hash
+        if len(self._best) + len(self._worst) > 4 * len(self._by_hash) + 64:
+            self._compact()
+        heap = self._best if best else self._worst
+        while heap:
+            _, arrival, tx_hash = heapq.heappop(heap)
+            entry = self._by_hash.get(tx_hash)
+            if entry is not None and entry[3] == abs(arrival):
+                return self.remove(tx_hash)
+        return None
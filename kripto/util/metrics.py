@@ -0,0 +1,133 @@
+import functools
+import json
+import math
+import threading
+import time
+from collections import Counter
+
+
+class Histogram:
+    """Count, sum, min, max and power-of-two buckets of observed values.
+
+    Percentiles are estimated from the buckets, so they are exact to within
+    a factor of two, which is enough to tell microseconds from milliseconds.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.buckets = Counter()  # exponent e -> values in [2**(e-1), 2**e)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.buckets[math.frexp(value)[1] if value > 0 else None] += 1
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for exponent in sorted(self.buckets, key=lambda e: -math.inf if e is None else e):
+            seen += self.buckets[exponent]
+            if seen >= rank:
+                return 0.0 if exponent is None else min(self.max, math.ldexp(1, exponent))
+        return self.max
+
+    def snapshot(self):
+        if not self.count:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p99": self.percentile(99),
+        }
+
+
+class Metrics:
+    """Opt-in counters, timers and histograms.
+
+    Everything is a no-op until enabled is set, instrumented code checks the
+    flag before it reads the clock, so the disabled cost is one attribute lookup.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.counters = Counter()
+            self.timers = {}      # name -> Histogram of seconds
+            self.histograms = {}  # name -> Histogram of values
+
+    def incr(self, name, amount=1):
+        if self.enabled:
+            with self._lock:
+                self.counters[name] += amount
+
+    def observe(self, name, value):
+        if self.enabled:
+            with self._lock:
+                self.histograms.setdefault(name, Histogram()).observe(value)
+
+    def record_time(self, name, seconds):
+        if self.enabled:
+            with self._lock:
+                self.timers.setdefault(name, Histogram()).observe(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "counters": dict(self.counters),
+                "timers": {name: h.snapshot() for name, h in self.timers.items()},
+                "histograms": {name: h.snapshot() for name, h in self.histograms.items()},
+            }
+
+    def export(self, path):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+    def show(self):
+        snapshot = self.snapshot()
+        print(f"Metrics {'enabled' if snapshot['enabled'] else 'disabled'}")
+        if not (snapshot["counters"] or snapshot["timers"] or snapshot["histograms"]):
+            print("Nothing recorded.\n")
+            return
+        for name, value in sorted(snapshot["counters"].items()):
+            print(f"  {name:<28} {value:>12,}")
+        for name, stats in sorted(snapshot["timers"].items()):
+            print(f"  {name:<28} {stats['count']:>8,} calls  total {stats['total']:9.3f}s  "
+                  f"mean {stats['mean'] * 1e6:10.1f}us  p99 {stats['p99'] * 1e6:10.1f}us")
+        for name, stats in sorted(snapshot["histograms"].items()):
+            print(f"  {name:<28} {stats['count']:>8,} values mean {stats['mean']:10.1f}  "
+                  f"min {stats['min']:g}  max {stats['max']:g}")
+
+
+metrics = Metrics()
+
+
+def timed(name):
+    """Decorator recording the call time of a function under name."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metrics.record_time(name, time.perf_counter() - start)
+        return wrapper
+    return decorator
@@ -0,0 +1,57 @@
+import multiprocessing as mp
+import os
+from .block import header_midstate, search_nonces
+
+CHUNK_SIZE = 50_000
+CANCEL_CHECK_INTERVAL = 1024
+
+_found = None
+
+
+def _init_worker(found):
+    global _found
+    _found = found
+
+
+def _search_chunk(header, start, stop, target):
+    # header = (number, prev_hash, merkle_root, timestamp)
+    midstate, suffix = header_midstate(*header)
+    for lo in range(start, stop, CANCEL_CHECK_INTERVAL):
+        best = _found.value
+        # a solution with a smaller nonce was already found, stop early
+        if best != -1 and best < start:
+            return None
+        result = search_nonces(midstate, suffix, lo, min(lo + CANCEL_CHECK_INTERVAL, stop), target)
+        if result is not None:
+            with _found.get_lock():
+                if _found.value == -1 or start < _found.value:
+                    _found.value = start
+            return result
+    return None
+
+
+def mine_parallel(block, target, workers=None, chunk_size=CHUNK_SIZE):
+    """Search the nonce space of block on a process pool.
+
+    The nonce space is cut into chunks that are handed out in order, and the
+    lowest chunk holding a solution wins, so the result is the same nonce
+    a sequential Block.mine would find. Returns (hash, nonce) and sets
+    block.nonce to the solution.
+    """
+    workers = workers or os.cpu_count() or 1
+    header = (block.number, block.prev_hash, block.merkle_root, block.timestamp)
+    found = mp.Value('q', -1)
+
+    start = block.nonce
+    with mp.Pool(workers, initializer=_init_worker, initargs=(found,)) as pool:
+        while True:
+            # a few chunks per worker per round keeps every core busy
+            tasks = []
+            for _ in range(workers * 2):
+                tasks.append((header, start, start + chunk_size, target))
+                start += chunk_size
+            for result in pool.starmap(_search_chunk, tasks):
+                if result is not None:
+                    nonce, hash_result = result
+                    block.nonce = nonce
+                    return hash_result, nonce
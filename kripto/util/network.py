@@ -0,0 +1,210 @@
+import asyncio
+import functools
+import itertools
+import random
+import statistics
+import time
+from . import codec
+from .block import Block, block_work
+from .blockchain import Blockchain
+from .transaction import Transaction
+
+
+class Node:
+    """One peer: a Blockchain plus the block tree it has seen.
+
+    Every known block is kept with its cumulative work. The node follows the
+    branch with the most work and switches to another branch (popping and
+    re-appending blocks) as soon as that branch overtakes it.
+    """
+
+    def __init__(self, node_id, network, genesis, difficulty, max_block_transactions):
+        self.node_id = node_id
+        self.network = network
+        # peers compare branches by work, so every block uses the same target
+        self.blockchain = Blockchain(initial_balance=10**12, genesis=genesis,
+                                     difficulty=difficulty, retarget_interval=None)
+        self.blockchain.verbose = False
+        self.blockchain.max_block_transactions = max_block_transactions
+        genesis_hash = genesis.calculate_hash()
+        self.blocks = {genesis_hash: genesis}
+        self.work = {genesis_hash: 0}
+        self.orphans = {}  # prev_hash -> blocks waiting for their parent
+        self.inbox = asyncio.Queue()
+        self.reorgs = 0
+
+    @property
+    def tip_hash(self):
+        return self.blockchain.get_last_block().calculate_hash()
+
+    def on_main_chain(self, block_hash):
+        height = self.blockchain.index.find_block(block_hash)
+        return height is not None and self.blockchain.chain[height].calculate_hash() == block_hash
+
+    def handle_transaction(self, tx):
+        tx_hash = tx.calculate_hash()
+        if tx_hash in self.blockchain.mempool or self.blockchain.index.find_transaction(tx_hash):
+            return False
+        accepted, _ = self.blockchain.submit_transaction(tx)
+        return accepted
+
+    def handle_block(self, block):
+        """Store a block and switch branches if needed, returns True if it was new."""
+        block_hash = block.calculate_hash()
+        if block_hash in self.blocks or not block.validate(target=self.blockchain.target):
+            return False
+        if block.prev_hash not in self.blocks:
+            self.orphans.setdefault(block.prev_hash, []).append(block)
+            return True
+
+        pending = [block]
+        while pending:
+            block = pending.pop()
+            block_hash = block.calculate_hash()
+            self.blocks[block_hash] = block
+            self.work[block_hash] = self.work[block.prev_hash] + block_work(self.blockchain.target)
+            if self.work[block_hash] > self.work[self.tip_hash]:
+                self._switch_to(block_hash)
+            pending.extend(self.orphans.pop(block_hash, []))
+        return True
+
+    def _switch_to(self, block_hash):
+        branch = []
+        while not self.on_main_chain(block_hash):
+            block = self.blocks[block_hash]
+            branch.append(block)
+            block_hash = block.prev_hash
+
+        popped = []
+        while self.tip_hash != block_hash:
+            popped.append(self.blockchain.pop_block())
+        if popped:
+            self.reorgs += 1
+
+        for i, block in enumerate(reversed(branch)):
+            if self.blockchain.accept_block(block) is not None:
+                # invalid branch: forget it and go back to the previous chain
+                for bad in branch[:len(branch) - i]:
+                    self.blocks.pop(bad.calculate_hash(), None)
+                for _ in range(i):
+                    self.blockchain.pop_block()
+                for old in reversed(popped):
+                    self.blockchain.append_block(old)
+                return False
+        return True
+
+    async def process_inbox(self):
+        while True:
+            kind, data = await self.inbox.get()
+            if kind == "tx":
+                tx, _ = codec.decode_transaction(data)
+                if self.handle_transaction(tx):
+                    self.network.broadcast(self, kind, data)
+            else:
+                block = codec.decode_block(data)
+                self.network.record_arrival(block.calculate_hash(), self.node_id)
+                if self.handle_block(block):
+                    self.network.broadcast(self, kind, data)
+
+    async def mine(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            blockchain = self.blockchain
+            transactions = list(itertools.islice(blockchain.mempool, blockchain.max_block_transactions))
+            if not transactions:
+                await asyncio.sleep(0.01)
+                continue
+            last_block = blockchain.get_last_block()
+            block = Block(last_block.number + 1, last_block.calculate_hash(), transactions)
+            # mining runs on a thread so the node keeps handling messages
+            await loop.run_in_executor(None, functools.partial(block.mine, target=blockchain.target))
+            self.network.record_mined(block.calculate_hash(), self.node_id)
+            # a block built on a tip that moved meanwhile still becomes a fork
+            if self.handle_block(block):
+                self.network.broadcast(self, "block", codec.encode_block(block))
+
+
+class Network:
+    """In-memory peer network with random per-message latency."""
+
+    def __init__(self, node_count, difficulty=3, latency=(0.005, 0.05),
+                 max_block_transactions=100, seed=None):
+        self.random = random.Random(seed)
+        self.latency = latency
+        genesis = Block(0, "0", [])
+        self.nodes = [Node(i, self, genesis, difficulty, max_block_transactions)
+                      for i in range(node_count)]
+        self.mined_at = {}   # block hash -> (node id, time)
+        self.arrivals = {}   # block hash -> {node id: first time seen}
+        self.messages = 0
+
+    def broadcast(self, sender, kind, data):
+        loop = asyncio.get_running_loop()
+        for node in self.nodes:
+            if node is not sender:
+                self.messages += 1
+                loop.call_later(self.random.uniform(*self.latency), node.inbox.put_nowait, (kind, data))
+
+    def record_mined(self, block_hash, node_id):
+        now = time.perf_counter()
+        self.mined_at[block_hash] = (node_id, now)
+        self.arrivals.setdefault(block_hash, {})[node_id] = now
+
+    def record_arrival(self, block_hash, node_id):
+        self.arrivals.setdefault(block_hash, {}).setdefault(node_id, time.perf_counter())
+
+    async def generate_transactions(self, users, rate):
+        # signing happens here, like a wallet, then the tx is sent to one node
+        while True:
+            sender, receiver = self.random.sample(users, 2)
+            tx = Transaction(sender, receiver, str(self.random.randint(1, 100)))
+            node = self.random.choice(self.nodes)
+            if node.handle_transaction(tx):
+                self.broadcast(node, "tx", bytes(codec.encode_transaction(tx)))
+            await asyncio.sleep(1 / rate)
+
+    async def run(self, duration, users, tx_rate=200):
+        tasks = [asyncio.create_task(node.process_inbox()) for node in self.nodes]
+        miners = [asyncio.create_task(node.mine()) for node in self.nodes]
+        generator = asyncio.create_task(self.generate_transactions(users, tx_rate))
+        start = time.perf_counter()
+        await asyncio.sleep(duration)
+        generator.cancel()
+        for task in miners:
+            task.cancel()
+        # let in-flight messages arrive before measuring convergence
+        await asyncio.sleep(self.latency[1] * 4)
+        elapsed = time.perf_counter() - start
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, *miners, generator, return_exceptions=True)
+        return self.metrics(elapsed)
+
+    def metrics(self, elapsed):
+        reference = self.nodes[0].blockchain
+        main_chain = {block.calculate_hash() for block in reference.chain}
+        latencies = []
+        for block_hash, (_, mined) in self.mined_at.items():
+            seen = self.arrivals.get(block_hash, {})
+            if len(seen) == len(self.nodes):
+                latencies.append(max(seen.values()) - mined)
+        committed = sum(len(block.transactions) for block in reference.chain)
+        return {
+            "nodes": len(self.nodes),
+            "seconds": elapsed,
+            "height": len(reference.chain) - 1,
+            "blocks_mined": len(self.mined_at),
+            "stale_blocks": sum(1 for h in self.mined_at if h not in main_chain),
+            "reorgs": sum(node.reorgs for node in self.nodes),
+            "converged": len({node.tip_hash for node in self.nodes}) == 1,
+            "messages": self.messages,
+            "committed_tx_per_sec": committed / elapsed,
+            "propagation_mean_ms": statistics.mean(latencies) * 1000 if latencies else None,
+            "propagation_max_ms": max(latencies) * 1000 if latencies else None,
+        }
+
+
+def simulate(node_count, duration=5.0, difficulty=3, users=("alice", "bob", "cecil", "dave"),
+             tx_rate=200, latency=(0.005, 0.05), seed=None):
+    network = Network(node_count, difficulty, latency, seed=seed)
+    return asyncio.run(network.run(duration, list(users), tx_rate))
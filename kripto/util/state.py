@@ -0,0 +1,41 @@
+import math
+
+
+def parse_amount(amount):
+    # amounts arrive as CLI strings, "15" and 15 are the same amount.
+    # nan and inf are rejected, they would pass every balance comparison
+    if isinstance(amount, int):
+        return amount
+    value = float(amount)
+    if not math.isfinite(value):
+        raise ValueError(f"Amount is not a finite number: {amount!r}")
+    if isinstance(amount, float):
+        return amount
+    return int(value) if value.is_integer() else value
+
+
+class AccountState:
+    """Account balances, updated block by block as the chain grows.
+
+    Every account starts with initial_balance. apply_block and revert_block
+    are exact inverses, so a removed block is rolled back in O(transactions).
+    """
+
+    def __init__(self, initial_balance=0):
+        self.initial_balance = initial_balance
+        self._balances = {}
+
+    def balance(self, account):
+        return self._balances.get(account, self.initial_balance)
+
+    def apply_block(self, block):
+        for tx in block.transactions:
+            amount = parse_amount(tx.amount)
+            self._balances[tx.sender] = self.balance(tx.sender) - amount
+            self._balances[tx.receiver] = self.balance(tx.receiver) + amount
+
+    def revert_block(self, block):
+        for tx in reversed(block.transactions):
+            amount = parse_amount(tx.amount)
+            self._balances[tx.receiver] = self.balance(tx.receiver) - amount
+            self._balances[tx.sender] = self.balance(tx.sender) + amount
@@ -0,0 +1,155 @@
+import json
+import mmap
+import os
+import struct
+from . import codec
+from .block import Block
+
+RECORD_HEADER = struct.Struct("<I")  # payload length
+INDEX_ENTRY = struct.Struct("<Q")    # log offset of the block at this height
+
+
+def encode_block(block):
+    return codec.encode_block(block)
+
+
+def decode_block(payload):
+    # stores written before the binary codec hold JSON records
+    if payload[:1] == b"{":
+        return Block.from_dict(json.loads(payload))
+    return codec.decode_block(payload)
+
+
+class ChainStore:
+    """On-disk chain: an append-only block log plus a height -> offset index.
+
+    blocks.log holds length-prefixed block records back to back, blocks.idx
+    holds one fixed-width offset per height. Both are read through mmap, so a
+    block is fetched by height without reading the rest of the file.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._log = open(os.path.join(directory, "blocks.log"), "a+b")
+        self._index = open(os.path.join(directory, "blocks.idx"), "a+b")
+        self._log_map = None
+        self._index_map = None
+        self._recover()
+
+    def _recover(self):
+        # drop a partially written tail left behind by an interrupted append
+        log_size = os.fstat(self._log.fileno()).st_size
+        count = os.fstat(self._index.fileno()).st_size // INDEX_ENTRY.size
+        end = 0
+        while count > 0:
+            self._index.seek((count - 1) * INDEX_ENTRY.size)
+            (offset,) = INDEX_ENTRY.unpack(self._index.read(INDEX_ENTRY.size))
+            self._log.seek(offset)
+            header = self._log.read(RECORD_HEADER.size)
+            if len(header) == RECORD_HEADER.size:
+                (length,) = RECORD_HEADER.unpack(header)
+                end = offset + RECORD_HEADER.size + length
+                if end <= log_size:
+                    break
+            count -= 1
+            end = 0
+        self._index.truncate(count * INDEX_ENTRY.size)
+        self._log.truncate(end)
+        self._count = count
+        self._log_end = end
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        for height in range(self._count):
+            yield self.get(height)
+
+    def append(self, block):
+        payload = encode_block(block)
+        offset = self._log_end
+        self._log.write(RECORD_HEADER.pack(len(payload)) + payload)
+        self._log.flush()
+        # the index entry is written last, so a crash never indexes a partial record
+        self._index.write(INDEX_ENTRY.pack(offset))
+        self._index.flush()
+        self._log_end = offset + RECORD_HEADER.size + len(payload)
+        self._count += 1
+
+    def truncate(self, height):
+        """Drop every block at or above height."""
+        if not 0 <= height <= self._count:
+            raise IndexError("block height out of range")
+        if height == self._count:
+            return
+        self._unmap()
+        if height == 0:
+            end = 0
+        else:
+            self._index.seek(height * INDEX_ENTRY.size)
+            (end,) = INDEX_ENTRY.unpack(self._index.read(INDEX_ENTRY.size))
+        self._index.truncate(height * INDEX_ENTRY.size)
+        self._log.truncate(end)
+        self._count = height
+        self._log_end = end
+
+    def _record(self, height):
+        # (log map, payload start, payload length) of the block at height
+        if not 0 <= height < self._count:
+            raise IndexError("block height out of range")
+        index_map = self._map_index()
+        (offset,) = INDEX_ENTRY.unpack_from(index_map, height * INDEX_ENTRY.size)
+        log_map = self._map_log()
+        (length,) = RECORD_HEADER.unpack_from(log_map, offset)
+        return log_map, offset + RECORD_HEADER.size, length
+
+    def read(self, height):
+        log_map, start, length = self._record(height)
+        return log_map[start:start + length]
+
+    def get(self, height):
+        return decode_block(self.read(height))
+
+    def get_header(self, height):
+        """Block header only, its transactions are read from disk on access."""
+        log_map, start, length = self._record(height)
+        if log_map[start:start + 1] == b"{":
+            block = decode_block(log_map[start:start + length])
+        else:
+            # only the fixed-width header is copied out of the map
+            block = codec.decode_header(log_map[start:start + codec.HEADER.size])
+        block.drop_transactions(lambda: self.get(height).transactions)
+        return block
+
+    def headers(self):
+        for height in range(self._count):
+            yield self.get_header(height)
+
+    def close(self):
+        self._unmap()
+        self._log.close()
+        self._index.close()
+
+    def _map_index(self):
+        # remap once the file has grown past the current mapping
+        size = self._count * INDEX_ENTRY.size
+        if self._index_map is None or len(self._index_map) < size:
+            if self._index_map is not None:
+                self._index_map.close()
+            self._index_map = mmap.mmap(self._index.fileno(), size, access=mmap.ACCESS_READ)
+        return self._index_map
+
+    def _map_log(self):
+        if self._log_map is None or len(self._log_map) < self._log_end:
+            if self._log_map is not None:
+                self._log_map.close()
+            self._log_map = mmap.mmap(self._log.fileno(), self._log_end, access=mmap.ACCESS_READ)
+        return self._log_map
+
+    def _unmap(self):
+        for m in (self._log_map, self._index_map):
+            if m is not None:
+                m.close()
+        self._log_map = None
+        self._index_map = None
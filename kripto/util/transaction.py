@@ -1,43 +1,71 @@
 import hashlib
 import json
-import os
+import secrets
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import ec
-from cryptography.hazmat.primitives import serialization
+from .keyring import keyring
+from .metrics import metrics, timed
+
 
-KEYS_DIR = os.path.join(os.path.dirname(__file__), "../keys")
-    
 class Transaction:
+    # transactions stored before nonces were added have none, their hash
+    # leaves the field out
+    nonce = None
+
     def __init__(self, sender, receiver, amount):
         self.sender = sender
         self.receiver = receiver
         self.amount = amount
+        # random and signed, so paying the same amount twice gives two
+        # different transactions
+        self.nonce = secrets.randbits(64)
         self.signature = self.sign_transaction()
 
+    def to_dict(self):
+        data = {
+            "sender": self.sender,
+            "receiver": self.receiver,
+            "amount": self.amount,
+            "signature": self.signature.hex(),
+        }
+        if self.nonce is not None:
+            data["nonce"] = self.nonce
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        # rebuilds a stored transaction without signing it again
+        transaction = cls.__new__(cls)
+        transaction.sender = data["sender"]
+        transaction.receiver = data["receiver"]
+        transaction.amount = data["amount"]
+        transaction.nonce = data.get("nonce")
+        transaction.signature = bytes.fromhex(data["signature"])
+        return transaction
+
     def calculate_hash(self):
         transaction_dict = {
             "sender": self.sender,
             "receiver": self.receiver,
             "amount": self.amount,
         }
+        if self.nonce is not None:
+            transaction_dict["nonce"] = self.nonce
         transaction_string = json.dumps(transaction_dict, sort_keys=True)
         return hashlib.sha256(transaction_string.encode()).hexdigest()
 
+    @timed("tx.sign")
     def sign_transaction(self):
-        private_key = serialization.load_pem_private_key(
-            open(f"{KEYS_DIR}/{self.sender}_private.pem", "rb").read(),
-            password=None,
-        )
+        private_key = keyring.private_key(self.sender)
         signature = private_key.sign(
             self.calculate_hash().encode(),
             ec.ECDSA(hashes.SHA256())
         )
         return signature
 
-    def verify_signature(self):
-        public_key = serialization.load_pem_public_key(
-            open(f"{KEYS_DIR}/{self.sender}_public.pem", "rb").read()
-        )
+    @timed("tx.verify")
+    def verify_signature(self, verbose=True):
+        public_key = keyring.public_key(self.sender)
         try:
             public_key.verify(
                 self.signature,
@@ -46,7 +74,9 @@ class Transaction:
             )
             return True
         except Exception as e:
-            print(f"Signature verification failed: {e}")
+            metrics.incr("tx.verify.failed")
+            if verbose:
+                print(f"Signature verification failed: {e}")
             return False
         
     def show_transaction(self):
@@ -54,6 +84,8 @@ class Transaction:
         print(f"  Sender: {self.sender}")
         print(f"  Receiver: {self.receiver}")
         print(f"  Amount: {self.amount}")
+        if self.nonce is not None:
+            print(f"  Nonce: {self.nonce}")
         print(f"  Signature: {self.signature.hex()}")
         print(f"  Transaction Hash: {self.calculate_hash()}")
         print("  " + "-" * 40)
@@ -1,5 +1,6 @@
 import hashlib
 from time import time
+from .metrics import timed
 
 
 def hash_transaction_pair(a_hash: str, b_hash: str) -> str:
@@ -7,23 +8,96 @@ def hash_transaction_pair(a_hash: str, b_hash: str) -> str:
     return hashlib.sha256(combined.encode()).hexdigest()
 
 
+@timed("merkle.root")
 def generate_merkle_root(transactions: list) -> str | None:
-    if not transactions:
-        return None
-
-    hashes = [t.calculate_hash() for t in transactions]
-
-    while len(hashes) > 1:
-        next_level = []
-        i = 0
-        while i < len(hashes):
-            if i + 1 < len(hashes):
-                next_level.append(hash_transaction_pair(hashes[i], hashes[i + 1]))
-                i += 2
+    return MerkleTree(transactions).root
+
+
+class MerkleTree:
+    """Merkle tree over transaction hashes with the same root as before.
+
+    Every level is a bytearray of concatenated 32-byte digests. An odd node is
+    promoted to the next level unchanged, so appending a transaction only
+    recomputes the right-most node of each level.
+    """
+
+    DIGEST_SIZE = 32
+
+    def __init__(self, transactions=()):
+        # a full build hashes each level pairwise in one pass, append is only
+        # for growing an existing tree
+        hashes = [tx.calculate_hash() for tx in transactions]
+        self.levels = [bytearray.fromhex("".join(hashes))]
+        while len(hashes) > 1:
+            upper = [hash_transaction_pair(hashes[i], hashes[i + 1]) for i in range(0, len(hashes) - 1, 2)]
+            if len(hashes) % 2:
+                upper.append(hashes[-1])
+            hashes = upper
+            self.levels.append(bytearray.fromhex("".join(hashes)))
+
+    def __len__(self):
+        return len(self.levels[0]) // self.DIGEST_SIZE
+
+    @property
+    def root(self) -> str | None:
+        if not self.levels[0]:
+            return None
+        return bytes(self.levels[-1]).hex()
+
+    def append(self, transaction):
+        self.append_hash(transaction.calculate_hash())
+
+    def append_hash(self, tx_hash: str):
+        size = self.DIGEST_SIZE
+        self.levels[0] += bytes.fromhex(tx_hash)
+        index = len(self) - 1
+        level = 0
+        while len(self.levels[level]) > size:
+            if level + 1 == len(self.levels):
+                self.levels.append(bytearray())
+            parent = index // 2
+            node = self._parent_node(self.levels[level], parent)
+            upper = self.levels[level + 1]
+            if parent * size == len(upper):
+                upper += node
             else:
-                # promote odd hash up unchanged
-                next_level.append(hashes[i])
-                i += 1
-        hashes = next_level
+                upper[parent * size:(parent + 1) * size] = node
+            index = parent
+            level += 1
+
+    def _parent_node(self, nodes, parent):
+        size = self.DIGEST_SIZE
+        left = nodes[2 * parent * size:(2 * parent + 1) * size]
+        right = nodes[(2 * parent + 1) * size:(2 * parent + 2) * size]
+        if not right:
+            # promote odd hash up unchanged
+            return left
+        return bytes.fromhex(hash_transaction_pair(left.hex(), right.hex()))
+
+    def proof(self, index: int) -> list:
+        """Return the inclusion proof of the leaf at index.
+
+        The proof is a list of (sibling_hash, side) pairs from the leaf upwards,
+        side being "left" or "right" depending on where the sibling sits.
+        """
+        if not 0 <= index < len(self):
+            raise IndexError("leaf index out of range")
+        size = self.DIGEST_SIZE
+        proof = []
+        for nodes in self.levels[:-1]:
+            sibling = index ^ 1
+            if sibling * size < len(nodes):
+                side = "left" if sibling < index else "right"
+                proof.append((nodes[sibling * size:(sibling + 1) * size].hex(), side))
+            index //= 2
+        return proof
+
 
-    return hashes[0]
+def verify_merkle_proof(tx_hash: str, proof: list, merkle_root: str) -> bool:
+    current = tx_hash
+    for sibling, side in proof:
+        if side == "left":
+            current = hash_transaction_pair(sibling, current)
+        else:
+            current = hash_transaction_pair(current, sibling)
+    return current == merkle_root